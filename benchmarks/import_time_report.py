@@ -0,0 +1,102 @@
+# import modules
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+# Modules a new server process imports, the app itself and the pages opened later
+MODULES = [
+    "streamlit",
+    "custom_pages.overview_page",
+    "custom_pages.social_media_page",
+    "custom_pages.plots_page",
+    "utils.corpus_cache",
+    "utils.corpus_manifest",
+]
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(module):
+    """
+    Imports the module in a fresh interpreter with -X importtime.
+        returns: [(nesting depth, imported module, cumulative microseconds)] in the order -X importtime
+        prints them, a module comes after the modules it imported
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=REPO_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    times = []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        times.append((depth, name.strip(), int(cumulative)))
+    return times
+
+
+def report(modules, top):
+    """
+    Total import time of each module and its slowest top level packages, in ms.
+    """
+    rows = {}
+    for module in modules:
+        times = import_times(module)
+        names = [name for _, name, _ in times]
+        end = names.index(module)
+        # The modules imported by the module itself, back to the previous top level import
+        # (interpreter startup or the parent package)
+        start = end
+        while start > 0 and times[start - 1][0] > 0:
+            start -= 1
+        packages = [(name, us) for depth, name, us in times[start:end] if depth == 1]
+        slowest = sorted(packages, key=lambda item: item[1], reverse=True)[:top]
+        rows[module] = {
+            "total_ms": round(times[end][2] / 1000, 1),
+            "slowest": {name: round(us / 1000, 1) for name, us in slowest},
+        }
+    return rows
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description="Import time of the dashboard modules (python -X importtime)")
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--top", type=int, default=5, help="slowest packages listed per module")
+    parser.add_argument("--save", help="write the report to this json file")
+    parser.add_argument("--baseline", help="json file of an earlier report to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="relative slow down over the baseline reported as a regression")
+    options = parser.parse_args(args)
+
+    rows = report(options.modules, options.top)
+    for module, row in rows.items():
+        print(f"{module:40} {row['total_ms']:>9.1f} ms")
+        for name, ms in row["slowest"].items():
+            print(f"    {name:36} {ms:>9.1f} ms")
+
+    if options.save:
+        with open(options.save, "w") as file:
+            json.dump(rows, file, indent=2)
+
+    regressions = []
+    if options.baseline:
+        with open(options.baseline) as file:
+            baseline = json.load(file)
+        for module, row in rows.items():
+            if module not in baseline:
+                continue
+            before = baseline[module]["total_ms"]
+            if row["total_ms"] > before * (1 + options.tolerance):
+                regressions.append(module)
+                print(f"REGRESSION {module}: {before:.1f} ms -> {row['total_ms']:.1f} ms")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    # python benchmarks/import_time_report.py [modules ...] [--save report.json] [--baseline report.json]
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,78 @@
+# import modules
+import os
+import sys
+import time
+import argparse
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Custom imports
+from utils.corpus_store import CorpusStore
+from utils.corpus_manifest import corpus_manifest
+from utils.keyword_matcher import KeywordMatcher
+
+COLUMNS = ['title', 'video_description', 'transcript_german']
+
+
+def row_wise(dataframe, columns, keywords):
+    """
+    The former keyword filter of the layouts (get_filter_keywords / check_keywords):
+    every text is lowercased once per keyword and row.
+    """
+    def check_keywords(text, keywords):
+        return any(keyword.lower() in str(text).lower() for keyword in keywords)
+    return dataframe.apply(lambda x: any(check_keywords(x[col], keywords) for col in columns), axis=1).to_numpy()
+
+
+def row_wise_all(dataframe, columns, keywords):
+    """
+    The same row wise search for posts that contain every keyword in one of the columns.
+    """
+    def check_keyword(row, keyword):
+        return any(keyword.lower() in str(row[col]).lower() for col in columns if pd.notna(row[col]))
+    return dataframe.apply(lambda x: all(check_keyword(x, keyword) for keyword in keywords), axis=1).to_numpy()
+
+
+def best_time(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description="Row wise keyword filter vs KeywordMatcher")
+    parser.add_argument("--korpus", help="korpus name, the first korpus of the manifest by default")
+    parser.add_argument("--keywords", default="rente,altersvorsorge,betriebsrente,arbeitgeber,steuer")
+    parser.add_argument("--scale", type=int, default=10, help="the posts are repeated this many times")
+    parser.add_argument("--repeat", type=int, default=3)
+    options = parser.parse_args(args)
+
+    korpus_dict = corpus_manifest.refresh()
+    korpus = options.korpus or next(iter(korpus_dict))
+    posts = CorpusStore().load(korpus_dict[korpus], text_columns=True).posts
+    posts = pd.concat([posts] * options.scale, ignore_index=True)
+    keywords = options.keywords.split(',')
+    print(f"{korpus}: {len(posts)} posts, keywords {keywords}")
+
+    baselines = {}
+    for mode, function in (('any', row_wise), ('all', row_wise_all)):
+        baselines[mode] = best_time(lambda: function(posts, COLUMNS, keywords), options.repeat)
+        print(f"{f'row wise ({mode})':28} {baselines[mode][0] * 1000:>9.1f} ms")
+    for mode, whole_word in (('any', False), ('all', False), ('any', True)):
+        matcher = KeywordMatcher(keywords, mode=mode, whole_word=whole_word)
+        seconds, mask = best_time(lambda: matcher.mask(posts, COLUMNS), options.repeat)
+        # Speedup and result against the row wise search of the same mode
+        old_seconds, expected = baselines[mode]
+        label = f"matcher ({mode}{', whole words' if whole_word else ''})"
+        note = ''
+        if not whole_word:
+            note = 'same result' if (mask == expected).all() else 'DIFFERENT RESULT'
+        print(f"{label:28} {seconds * 1000:>9.1f} ms  x{old_seconds / seconds:5.1f}  {mask.sum():>6} posts  {note}")
+
+if __name__ == '__main__':
+    # python benchmarks/keyword_matcher_benchmark.py [--scale 10] [--keywords a,b,c]
+    main(sys.argv[1:])
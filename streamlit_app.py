@@ -2,9 +2,18 @@ import streamlit as st
 from streamlit_option_menu import option_menu
 
 import os 
+import sys
+import importlib
 
-# custom modules
-from custom_pages import overview_page,social_media_page,plots_page,keyword_in_context_page,topic_modelling_page
+# Pages are imported when they are opened, the Overview page needs none of the
+# korpus and plotting modules. (module, takes the korpus dict)
+PAGES = {
+    "Overview": ("custom_pages.overview_page", False),
+    "Social Media": ("custom_pages.social_media_page", True),
+    "Plots&Metrics": ("custom_pages.plots_page", True),
+    "Keyword in Context": ("custom_pages.keyword_in_context_page", False),
+    "Topic Modelling": ("custom_pages.topic_modelling_page", False),
+}
 
 st.set_page_config(layout="wide",page_title="ALSO DASHBOARD")
 st.title("__ALSO PROJECT DASHBOARD__")
@@ -20,25 +29,6 @@ class ALSO_DASHBOARD:
                           })
         
     def run():
-        ############### KORPUS DATABASE ##################
-        DATABASE_DIR = 'database'
-
-        korpus_dict= {'Altersarmut_korpus':DATABASE_DIR+'/Altersarmut_korpus.csv',
-                    'Altersvorsorge_korpus':DATABASE_DIR+'/Altersvorsorge_korpus.csv',
-                    'Rentensystem_korpus':DATABASE_DIR+'/Rentensystem_korpus.csv',
-
-                    'Betriebliche_Altersvorsoge_korpus':DATABASE_DIR+'/Betriebliche_Altersvorsoge_korpus.csv',
-                    'öR-Pflichtsysteme_korpus':DATABASE_DIR+'/öR_Pflichtsysteme_korpus.csv',
-                    'Private_Vorsorge_korpus':DATABASE_DIR+'/Private_Vorsorge_korpus.csv',
-                    'Säulenübergreifend_korpus':DATABASE_DIR+'/Säulenübergreifend_korpus.csv',
-                    
-                    'influencer_korpus':DATABASE_DIR+'/influencer_korpus.csv',
-
-                    'Final_Top_50_Liked_Posts': DATABASE_DIR+'/Final_top_50_liked_posts.csv',
-                    'Top_50_Posts_Report':DATABASE_DIR+'/Top_50_Posts_Report.csv',
-                    'Top_50_Posts_Report_No_immotommy': DATABASE_DIR+'/Top_50_Posts_Report_No_immotommy.csv'
-                    }
-
         with st.sidebar:
             app = option_menu(
                 menu_title = "Features",
@@ -47,15 +37,28 @@ class ALSO_DASHBOARD:
                 default_index = 0,  
             )        
 
-        if app == 'Overview':
-            overview_page.app()
-        elif app == 'Social Media':
-            social_media_page.app(dataframe_dict=korpus_dict)
-        elif app == 'Plots&Metrics':
-            plots_page.app(dataframe_dict=korpus_dict)
-        elif app == 'Keyword in Context':
-            keyword_in_context_page.app(dataframe_dict=korpus_dict)
-        elif     app == 'Topic Modelling':
-            topic_modelling_page.app(dataframe_dict=korpus_dict)
+        module_name, uses_korpus = PAGES[app]
+        page = importlib.import_module(module_name)
+        if uses_korpus:
+            ############### KORPUS DATABASE ##################
+            # The korpus sources are listed in utils/corpus_store.py, new or changed korpora are
+            # ingested here and korpora without data are left out
+            from utils.corpus_manifest import corpus_manifest
+            korpus_dict = corpus_manifest.refresh()
+            page.app(dataframe_dict=korpus_dict)
+        else:
+            page.app()
+
+        # Hit/miss counts of the korpus cache shared by all sessions of this server,
+        # only once a korpus page has loaded it
+        if 'utils.corpus_cache' in sys.modules:
+            with st.sidebar.expander("Korpus cache"):
+                st.json(sys.modules['utils.corpus_cache'].corpus_cache.stats())
+                if 'utils.filter_engine' in sys.modules:
+                    st.caption("Filter results")
+                    st.json(sys.modules['utils.filter_engine'].filter_engine.result_cache.stats())
+                if 'utils.figure_cache' in sys.modules:
+                    st.caption("Plots")
+                    st.json(sys.modules['utils.figure_cache'].figure_cache.stats())
             
     run()
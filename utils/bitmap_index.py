@@ -0,0 +1,65 @@
+# import modules
+import numpy as np
+import pandas as pd
+
+# Low cardinality post columns of the filter panel
+BITMAP_COLUMNS = ['platform', 'canonical_hashtag', 'profile_name', 'channel_name', 'media_type',
+                  'german_sentiment_transcript_label']
+# Instagram posts are Reels or Posts depending on is_video
+INSTAGRAM_TYPE = 'instagram_type'
+
+
+class BitmapIndex():
+    """
+    One packed bitmap (np.packbits, 1 bit per post) per value of the low cardinality
+    columns. A selection ORs the bitmaps of its values, the selections of the filter
+    panel are ANDed, and the result is unpacked once.
+    """
+
+    def __init__(self, size, bitmaps) -> None:
+        self.size = size
+        self.bitmaps = bitmaps  # column -> value -> packed uint8 array
+
+    @classmethod
+    def build(cls, posts, columns=BITMAP_COLUMNS):
+        bitmaps = {}
+        for column in columns:
+            if column in posts.columns:
+                bitmaps[column] = cls.value_bitmaps(posts[column].astype(object).to_numpy())
+        if 'is_video' in posts.columns:
+            instagram_type = np.where(posts['is_video'].astype(bool), 'Reels', 'Posts')
+            bitmaps[INSTAGRAM_TYPE] = cls.value_bitmaps(instagram_type)
+        return cls(len(posts), bitmaps)
+
+    @staticmethod
+    def value_bitmaps(values):
+        # Missing values get code -1 and no bitmap, like isin they match no selection
+        codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+        return {str(value): np.packbits(codes == code) for code, value in enumerate(uniques)}
+
+    def empty(self):
+        return np.zeros((self.size + 7) // 8, dtype=np.uint8)
+
+    def select(self, column, values):
+        """
+        Packed bitmap of the posts with one of the values in the column.
+        """
+        bitmaps = self.bitmaps.get(column, {})
+        selected = self.empty()
+        for value in values:
+            bitmap = bitmaps.get(str(value))
+            if bitmap is not None:
+                selected |= bitmap
+        return selected
+
+    def mask(self, selections):
+        """
+        Boolean array over the posts for [(column, values), ...]: OR within a column, AND across columns.
+        """
+        packed = np.full((self.size + 7) // 8, 0xFF, dtype=np.uint8)
+        for column, values in selections:
+            packed &= self.select(column, values)
+        return np.unpackbits(packed, count=self.size).astype(bool)
+
+    def memory_usage(self):
+        return int(sum(bitmap.nbytes for bitmaps in self.bitmaps.values() for bitmap in bitmaps.values()))
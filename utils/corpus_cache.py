@@ -0,0 +1,97 @@
+# import modules
+import os
+import threading
+from collections import OrderedDict
+
+# Custom imports
+from utils.corpus_store import CorpusStore
+
+
+class CorpusCache():
+    """
+    One cache of loaded korpora per server process, shared by all sessions.
+
+    Entries are keyed by (corpus name, file mtime) so a re-ingested korpus is
+    picked up automatically. The least recently used entries are evicted once
+    the cached frames exceed the memory budget.
+    """
+
+    def __init__(self, memory_budget_mb, store=None) -> None:
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.store = store if store is not None else CorpusStore()
+        self.entries = OrderedDict()  # (corpus_name, mtime) -> (corpus, size in bytes)
+        self.loading = {}  # (corpus_name, mtime) -> threading.Event, set once the korpus is loaded
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, corpus_name, csv_path):
+        """
+        Returns the Corpus shared by all sessions. Its frames are read-only
+        (Corpus.freeze): writing into a column raises a ValueError, and columns
+        must not be added or replaced. Filter results are new frames that can
+        be changed.
+        """
+        # Ingesting and loading run outside the cache lock, a cold korpus does not
+        # block the sessions of the other korpora
+        self.store.ensure_ingested(csv_path)
+        key = (corpus_name, self.store.mtime(csv_path))
+        while True:
+            with self.lock:
+                if key in self.entries:
+                    self.hits += 1
+                    self.entries.move_to_end(key)
+                    return self.entries[key][0]
+                loading = self.loading.get(key)
+                if loading is None:
+                    loading = self.loading[key] = threading.Event()
+                    self.misses += 1
+                    break
+            # Another session loads this korpus, it is taken from the cache once loaded
+            loading.wait()
+
+        try:
+            corpus = self.store.load(csv_path, corpus_name).freeze()
+            with self.lock:
+                # Drop the entries of older versions of this korpus
+                for stale_key in [k for k in self.entries if k[0] == corpus_name]:
+                    del self.entries[stale_key]
+                self.entries[key] = (corpus, corpus.memory_usage())
+                self.evict(keep=key)
+        finally:
+            with self.lock:
+                del self.loading[key]
+            loading.set()
+        return corpus
+
+    def evict(self, keep=None):
+        # The entry that was just loaded is kept even if it alone exceeds the budget
+        while self.memory_usage() > self.memory_budget and len(self.entries) > 1:
+            oldest_key = next(iter(self.entries))
+            if oldest_key == keep:
+                break
+            del self.entries[oldest_key]
+            self.evictions += 1
+
+    def memory_usage(self):
+        return sum(size for _, size in self.entries.values())
+
+    def stats(self):
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': [name for name, _ in self.entries],
+                'memory_usage_mb': round(self.memory_usage() / (1024 * 1024), 1),
+                'memory_budget_mb': round(self.memory_budget / (1024 * 1024), 1),
+            }
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+# Process wide instance, the budget can be set with the ALSO_CORPUS_CACHE_MB environment variable
+corpus_cache = CorpusCache(memory_budget_mb=float(os.environ.get('ALSO_CORPUS_CACHE_MB', 2048)))
@@ -0,0 +1,91 @@
+# import modules
+import datetime
+import threading
+
+# Custom imports
+from utils.corpus_store import CorpusStore, KORPUS_SOURCES
+
+
+class KorpusManifest():
+    """
+    Filter widget metadata of one korpus, see CorpusStore.summarize.
+    """
+
+    def __init__(self, name, entry) -> None:
+        self.name = name
+        self.entry = entry
+
+    @property
+    def csv_path(self):
+        return self.entry['csv_path']
+
+    def groups(self):
+        """
+        Distinct hashtags (profiles for the influencer korpus).
+        """
+        return self.entry['groups']
+
+    def cells(self, groups=None, platforms=None, media_types=None):
+        """
+        The platform / hashtag / media type cells matching the selection, no selection matches all.
+        """
+        return [cell for cell in self.entry['cells']
+                if (not groups or cell['group'] in groups)
+                and (not platforms or cell['platform'] in platforms)
+                and (not media_types or cell['media_type'] in media_types)]
+
+    def date_range(self, cells):
+        """
+        First and last upload date of the cells, (None, None) if none of them has upload dates.
+        """
+        dates = [cell['upload_date'] for cell in cells if cell['upload_date']]
+        if not dates:
+            return None, None
+        return (datetime.date.fromisoformat(min(start for start, _ in dates)),
+                datetime.date.fromisoformat(max(end for _, end in dates)))
+
+    def value_range(self, cells, column):
+        ranges = [cell[column] for cell in cells if column in cell]
+        if not ranges:
+            return 0, 0
+        return min(low for low, _ in ranges), max(high for _, high in ranges)
+
+    def channels(self, cells):
+        return list(dict.fromkeys(channel for cell in cells for channel in cell['channels']))
+
+
+class CorpusManifest():
+    """
+    The korpora of the dashboard with their widget metadata, so the filter panel
+    can be drawn without loading a korpus. Backed by database/columnar/manifest.json.
+    """
+
+    def __init__(self, store=None, sources=KORPUS_SOURCES) -> None:
+        self.store = store if store is not None else CorpusStore()
+        self.sources = sources
+        self.entries = {}
+        self.mtimes = None  # {korpus name: mtime of the CSV and store.json} when the manifest was built
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        """
+        Ingests new or changed korpora and reloads the manifest. Only the modification
+        times are read if no CSV or store.json changed since the last refresh.
+            returns: {korpus name: csv path} of the korpora with data
+        """
+        # Taken before building, a korpus that changes meanwhile is rebuilt on the next refresh
+        mtimes = {name: self.store.mtime(csv_path) for name, csv_path in self.sources.items()}
+        with self.lock:
+            if mtimes != self.mtimes:
+                self.entries = self.store.build_manifest(self.sources)
+                self.mtimes = mtimes
+            return {name: entry['csv_path'] for name, entry in self.entries.items()}
+
+    def korpus(self, name):
+        if name not in self.entries:
+            self.refresh()
+        return KorpusManifest(name, self.entries[name])
+
+
+# Process wide instance, shared by all sessions like the korpus cache
+corpus_manifest = CorpusManifest()
@@ -0,0 +1,123 @@
+# import modules
+import os
+import sys
+import glob
+import pandas as pd
+
+# Column types of the korpus tables, applied once when a korpus is ingested.
+# Columns missing from a korpus are skipped (e.g. the influencer korpus has
+# profile_name instead of hashtag), columns not listed keep the type read from the CSV.
+POSTS_SCHEMA = {
+    "video_id": "string",
+    "title": "string",
+    "thumbnail_url": "string",
+    "video_description": "string",
+    "channel_id": "category",
+    "channel_url": "string",
+    "video_duration": "string",
+    "views_count": "Int64",
+    "original_url": "string",
+    "video_category": "category",
+    "comments_count": "Int64",
+    "like_count": "Int64",
+    "channel_name": "string",
+    "subscribers_count": "Int64",
+    "upload_date": "datetime64[ns]",
+    "time_stamp": "string",
+    "video_language": "category",
+    "video_ext": "category",
+    "transcript_german": "string",
+    "extracted_date": "string",  # unix timestamp (YouTube) or formatted date (TikTok/Instagram)
+    "hashtag": "category",
+    "canonical_hashtag": "category",  # see utils/hashtags.py
+    "profile_name": "category",
+    "platform": "category",
+    "media_type": "category",
+    "transcript_source": "category",
+}
+
+COMMENTS_SCHEMA = {
+    "video_id": "string",
+    "comment_id": "string",
+    "replied_to_comment_id": "string",
+    "comment_text": "string",
+    "comment_likes": "Int64",
+    "author_id": "string",
+    "author_name": "string",
+    "author_thumbnail": "string",
+    "comment_date": "datetime64[ns]",
+}
+
+# Missing counts are shown and filtered as 0
+FILL_VALUES = {
+    "views_count": 0,
+    "comments_count": 0,
+    "like_count": 0,
+    "subscribers_count": 0,
+    "comment_likes": 0,
+}
+
+# Identifiers are read as text so numeric TikTok ids are not turned into floats
+ID_COLUMNS = ["video_id", "channel_id", "comment_id", "replied_to_comment_id", "author_id"]
+
+
+def apply_schema(dataframe, schema):
+    """
+    Returns the dataframe with the columns of the schema converted to their types.
+    """
+    dataframe = dataframe.copy()
+    if 'subscribers_count' in dataframe.columns:
+        # TikTok has no subscribers count
+        no_count = dataframe['subscribers_count'].astype(str) == 'No subscribers count'
+        dataframe['subscribers_count'] = dataframe['subscribers_count'].mask(no_count, 0)
+
+    for column, dtype in schema.items():
+        if column not in dataframe.columns:
+            continue
+        values = dataframe[column]
+        if column in FILL_VALUES:
+            values = values.fillna(FILL_VALUES[column])
+        if dtype == "Int64":
+            values = pd.to_numeric(values, errors='coerce').round().astype("Int64")
+        elif dtype.startswith("datetime64"):
+            values = pd.to_datetime(values, errors='coerce')
+        else:
+            values = values.astype(dtype)
+        dataframe[column] = values
+    return dataframe
+
+
+def memory_report(csv_paths):
+    """
+    Compares the memory footprint of each korpus read as plain object columns
+    (like pd.read_csv does) with the typed tables, and with the columns the
+    dashboard keeps in memory (the long texts are read per post).
+    """
+    # Imported here, corpus_store imports this module
+    from utils.corpus_store import CorpusStore
+
+    store = CorpusStore()
+    rows = []
+    for csv_path in csv_paths:
+        untyped = pd.read_csv(csv_path, low_memory=False)
+        corpus = store.load(csv_path, text_columns=True)
+        object_bytes = untyped.memory_usage(deep=True).sum()
+        typed_bytes = corpus.memory_usage()
+        loaded_bytes = store.load(csv_path).memory_usage()
+        rows.append({
+            'korpus': os.path.splitext(os.path.basename(csv_path))[0],
+            'rows': len(untyped),
+            'posts': len(corpus.posts),
+            'comments': len(corpus.comments),
+            'object_mb': round(object_bytes / 1024 ** 2, 2),
+            'typed_mb': round(typed_bytes / 1024 ** 2, 2),
+            'loaded_mb': round(loaded_bytes / 1024 ** 2, 2),
+            'saving': f"{1 - loaded_bytes / object_bytes:.0%}",
+        })
+    return pd.DataFrame(rows)
+
+
+if __name__ == '__main__':
+    # python -m utils.corpus_schema [database/<korpus>.csv ...]
+    csv_paths = sys.argv[1:] or sorted(glob.glob(os.path.join('database', '*.csv')))
+    print(memory_report(csv_paths).to_string(index=False))
@@ -0,0 +1,629 @@
+# import modules
+import os
+import sys
+import glob
+import json
+import shutil
+import threading
+import operator
+from functools import reduce
+from urllib.parse import quote
+import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Custom imports
+from utils.corpus_schema import POSTS_SCHEMA, COMMENTS_SCHEMA, ID_COLUMNS, apply_schema
+from utils.text_index import TextIndex
+from utils.post_stats import PostStats
+from utils.date_index import DateIndex
+from utils.bitmap_index import BitmapIndex
+from utils.hashtags import hashtag_columns
+from utils.term_counts import TermCounts
+
+# Korpora of the dashboard: name shown in the korpus selectbox -> CSV file
+DATABASE_DIR = 'database'
+KORPUS_SOURCES = {
+    'Altersarmut_korpus': DATABASE_DIR + '/Altersarmut_korpus.csv',
+    'Altersvorsorge_korpus': DATABASE_DIR + '/Altersvorsorge_korpus.csv',
+    'Rentensystem_korpus': DATABASE_DIR + '/Rentensystem_korpus.csv',
+
+    'Betriebliche_Altersvorsoge_korpus': DATABASE_DIR + '/Betriebliche_Altersvorsoge_korpus.csv',
+    'öR-Pflichtsysteme_korpus': DATABASE_DIR + '/öR_Pflichtsysteme_korpus.csv',
+    'Private_Vorsorge_korpus': DATABASE_DIR + '/Private_Vorsorge_korpus.csv',
+    'Säulenübergreifend_korpus': DATABASE_DIR + '/Säulenübergreifend_korpus.csv',
+
+    'influencer_korpus': DATABASE_DIR + '/influencer_korpus.csv',
+
+    'Final_Top_50_Liked_Posts': DATABASE_DIR + '/Final_top_50_liked_posts.csv',
+    'Top_50_Posts_Report': DATABASE_DIR + '/Top_50_Posts_Report.csv',
+    'Top_50_Posts_Report_No_immotommy': DATABASE_DIR + '/Top_50_Posts_Report_No_immotommy.csv',
+}
+
+# Typed columnar copies of the database/*.csv files live here
+STORE_DIR = os.path.join(DATABASE_DIR, 'columnar')
+# Counts, distinct values and ranges of every korpus for the filter widgets
+MANIFEST_FILE = 'manifest.json'
+# Numeric columns the filter sliders need a range for
+RANGE_COLUMNS = ['views_count', 'like_count', 'comments_count', 'subscribers_count']
+SUMMARY_COLUMNS = ['video_id', 'platform', 'canonical_hashtag', 'profile_name', 'media_type', 'upload_date', 'channel_name'] + RANGE_COLUMNS
+
+# Bump when ingest changes the stored columns, older files are then re-ingested
+STORE_VERSION = '10'
+STORE_INFO_FILE = 'store.json'
+# Inverted index of the post texts for the keyword filter (see utils/text_index.py)
+TEXT_INDEX_FILE = 'text_index.parquet'
+# Word counts of the transcripts and comments for the word clouds (see utils/term_counts.py)
+TERM_COUNTS_FILE = 'term_counts.npz'
+
+# Both tables are partitioned by platform / hashtag (profile for the influencer korpus). Only the
+# hashtags with more than MONTH_PARTITION_POSTS posts in a batch are split by upload month as well:
+#   database/columnar/<korpus>/posts/p_platform=YouTube/p_group=betriebsrente/p_month=all/part-0000-0.parquet
+#   database/columnar/<korpus>/posts/p_platform=YouTube/p_group=rente/p_month=2023-01/part-0000-0.parquet
+# Comments are stored in the partition of their post.
+PARTITION_COLUMNS = ['p_platform', 'p_group', 'p_month']
+# Instagram posts have a list of hashtags, they share one partition per platform and month
+MULTIPLE_GROUP = 'multiple'
+UNKNOWN_PARTITION = 'unknown'
+ALL_MONTHS_PARTITION = 'all'
+MONTH_PARTITION_POSTS = int(os.environ.get('ALSO_MONTH_PARTITION_POSTS', 50000))
+# Position of a row in the korpus, the partitions are read back in this order
+ROW_COLUMN = '_row'
+
+# Ingests and appends of a korpus are serialized by one reentrant lock per korpus
+# directory, shared by all CorpusStore instances of the process
+INGEST_LOCKS = {}
+INGEST_LOCKS_GUARD = threading.Lock()
+
+# Rows of an appended batch that are already stored are skipped. TikTok comment ids are
+# positions that replies reuse, so the author and text are part of the comment key
+POST_KEY = ['video_id']
+COMMENT_KEY = ['video_id', 'comment_id', 'author_id', 'comment_text']
+
+# Stringified (label, scores) tuples of the german sentiment model, e.g.
+# "(['neutral'], [[['positive', 0.0006], ['negative', 0.002], ['neutral', 0.997]]])"
+SENTIMENT_COLUMNS = ['german_sentiment_transcript', 'german_sentiment_comments']
+SENTIMENT_LABELS = ['positive', 'negative', 'neutral']
+
+# Columns that belong to a comment, every other column describes the post.
+# In the CSV files a comment row only repeats a few of its post columns (platform, hashtag, ...)
+COMMENT_COLUMNS = ['comment_id', 'replied_to_comment_id', 'comment_text', 'comment_likes',
+                   'author_id', 'author_name', 'author_thumbnail', 'author_is_verified',
+                   'comment_timestamp', 'comment_is_pinned', 'comment_date',
+                   'german_sentiment_comments', 'sentiws_sentiment_comments',
+                   ] + [f'german_sentiment_comments_{suffix}' for suffix in ['label'] + SENTIMENT_LABELS]
+
+# Long texts that the filters and the grid never look at. They stay on disk and are read
+# per video_id when a post is opened or a keyword/word cloud needs them (see Corpus.fetch)
+POST_TEXT_COLUMNS = ['video_description', 'transcript_german', 'german_sentiment_transcript',
+                     'thumbnail_url', 'channel_url', 'original_url', 'hashtags']
+COMMENT_TEXT_COLUMNS = ['comment_text', 'author_id', 'author_name', 'author_thumbnail',
+                        'german_sentiment_comments']
+
+
+class Corpus():
+    """
+    A korpus split into a posts table (one row per video_id) and a comments
+    table (one row per comment, linked to its post by video_id).
+
+    posts and comments hold the columns used for filtering. The long text
+    columns are read from the Parquet tables on demand with fetch(), keyword
+    searches go through text_index. post_stats holds the counts of the posts
+    as int64 arrays for the sliders, date_index the posts sorted by upload date
+    and bitmaps the posts of each platform, hashtag, channel, ... value.
+    term_counts holds the word counts of the transcripts and comments for the word clouds.
+    """
+
+    def __init__(self, name, posts, comments, store, csv_path, text_index=None, post_stats=None,
+                 date_index=None, bitmaps=None, term_counts=None) -> None:
+        self.name = name
+        self.posts = posts
+        self.comments = comments
+        self.store = store
+        self.csv_path = csv_path
+        self.text_index = text_index
+        self.post_stats = post_stats if post_stats is not None else PostStats.build(posts, RANGE_COLUMNS)
+        self.date_index = date_index if date_index is not None else DateIndex.build(posts, comments)
+        self.bitmaps = bitmaps if bitmaps is not None else BitmapIndex.build(posts)
+        self.term_counts = term_counts
+
+    def fetch(self, table, video_ids=None, columns=None):
+        """
+        Reads the rows of the given videos (all rows if None) from the posts
+        or comments table, with all columns or only the given ones.
+        Only the partitions that hold these videos are opened.
+        """
+        if columns is not None:
+            columns = ['video_id'] + [c for c in columns if c != 'video_id']
+        partitions = None
+        if video_ids is not None:
+            if isinstance(video_ids, str):
+                video_ids = [video_ids]
+            video_ids = {str(video_id) for video_id in video_ids}
+            posts = self.posts.iloc[self.post_stats.positions(video_ids)]
+            partitions = {column: set(values) for column, values in self.store.partition_keys(posts).items()}
+        return self.store.read_table(self.csv_path, table, columns=columns, video_ids=video_ids, partitions=partitions)
+
+    def post(self, video_id):
+        """
+        Returns the post row of a video with all its columns as a Series.
+        """
+        return self.fetch('posts', [video_id]).iloc[0]
+
+    def comments_for(self, video_ids, columns=None):
+        return self.fetch('comments', video_ids, columns)
+
+    def with_text(self, dataframe, columns):
+        """
+        Adds the given post text columns to a (filtered) posts frame, only the
+        texts of its video_ids are read.
+        """
+        columns = [c for c in columns if c not in dataframe.columns]
+        if not columns:
+            return dataframe
+        text = self.fetch('posts', dataframe['video_id'], columns).drop_duplicates('video_id').set_index('video_id')
+        return dataframe.assign(**{column: dataframe['video_id'].map(text[column]) for column in columns})
+
+    def word_frequencies(self, video_ids, table='posts'):
+        """
+        Word frequencies of the transcripts (table='posts') or the comments
+        (table='comments') of the given videos, summed from term_counts.
+        """
+        positions = self.post_stats.positions(video_ids)
+        if table == 'comments':
+            positions = self.date_index.comment_rows(positions)
+        return self.term_counts.frequencies(table, positions)
+
+    def join(self, video_ids=None, post_columns=None):
+        """
+        Joins the comments with the columns of their post on demand.
+        """
+        comments = self.comments_for(video_ids)
+        posts = self.fetch('posts', video_ids, post_columns).drop_duplicates('video_id')
+        return comments.merge(posts, on='video_id', how='left', suffixes=('', '_post'))
+
+    def rows(self, video_ids=None):
+        """
+        Returns posts and comments in the layout of the korpus CSV files
+        (post rows first, comment rows with empty post columns), e.g. for downloads.
+        """
+        return pd.concat([self.fetch('posts', video_ids), self.fetch('comments', video_ids)], ignore_index=True)
+
+    def memory_usage(self):
+        return int(self.posts.memory_usage(deep=True).sum() + self.comments.memory_usage(deep=True).sum()
+                   + self.post_stats.memory_usage() + self.bitmaps.memory_usage()
+                   + (self.term_counts.memory_usage() if self.term_counts is not None else 0))
+
+    def freeze(self):
+        """
+        Marks the column arrays of the posts and comments read-only: the korpus is shared
+        by all sessions (utils/corpus_cache.py), writing into it raises a ValueError.
+        Columns must not be added or replaced either, filter results are new frames.
+        """
+        for dataframe in (self.posts, self.comments):
+            for array in dataframe._mgr.arrays:
+                # numpy columns and the numpy arrays behind categorical, datetime and nullable columns
+                for values in [array] + [getattr(array, name, None) for name in ('_ndarray', '_data', '_mask')]:
+                    if isinstance(values, np.ndarray):
+                        values.flags.writeable = False
+            # Columns taken before were views with their own flags, they are taken again
+            dataframe._clear_item_cache()
+        return self
+
+
+class CorpusStore():
+    """
+    Ingests the korpus CSV files into partitioned, typed Parquet tables and loads them back.
+
+    The CSV stays the source of truth: a corpus is re-ingested automatically
+    when its CSV is newer than the Parquet tables. New scrape batches can be
+    appended without rewriting the stored partitions.
+    """
+
+    def __init__(self, store_dir=STORE_DIR) -> None:
+        self.store_dir = store_dir
+
+    def korpus_dir(self, csv_path):
+        return os.path.join(self.store_dir, os.path.splitext(os.path.basename(csv_path))[0])
+
+    def table_dir(self, csv_path, table='posts'):
+        return os.path.join(self.korpus_dir(csv_path), table)
+
+    def store_info(self, csv_path):
+        """
+        The store.json of a korpus: store version, mtime of the ingested CSV and the written batches.
+        """
+        info_path = os.path.join(self.korpus_dir(csv_path), STORE_INFO_FILE)
+        if not os.path.exists(info_path):
+            return None
+        with open(info_path, 'r') as file:
+            return json.load(file)
+
+    def write_store_info(self, korpus_dir, info):
+        # Written last, a batch only becomes visible once it is listed here
+        tmp_path = os.path.join(korpus_dir, STORE_INFO_FILE + '.tmp')
+        with open(tmp_path, 'w') as file:
+            json.dump(info, file, indent=4)
+        os.replace(tmp_path, os.path.join(korpus_dir, STORE_INFO_FILE))
+
+    def mtime(self, csv_path):
+        """
+        Modification time of the korpus, used to tell versions of a korpus apart.
+        """
+        info_path = os.path.join(self.korpus_dir(csv_path), STORE_INFO_FILE)
+        paths = [path for path in (csv_path, info_path) if os.path.exists(path)]
+        return max((os.path.getmtime(path) for path in paths), default=0.0)
+
+    def ingest_lock(self, csv_path):
+        korpus_dir = os.path.abspath(self.korpus_dir(csv_path))
+        with INGEST_LOCKS_GUARD:
+            return INGEST_LOCKS.setdefault(korpus_dir, threading.RLock())
+
+    def ensure_ingested(self, csv_path):
+        """
+        Ingests the CSV if the korpus has no tables yet or they are stale.
+        """
+        with self.ingest_lock(csv_path):
+            if self.is_stale(csv_path):
+                self.ingest(csv_path)
+
+    def is_stale(self, csv_path):
+        info = self.store_info(csv_path)
+        if info is None or info.get('version') != STORE_VERSION:
+            return True
+        if not os.path.exists(csv_path):
+            return False
+        return os.path.getmtime(csv_path) > info['source_mtime']
+
+    def ingest(self, csv_path):
+        """
+        Parses the CSV once and writes its posts and comments as partitioned Parquet tables,
+        typed as described in utils/corpus_schema.py. Batches appended to the previous
+        version of the korpus are appended again if their files still exist.
+            returns: directory of the korpus tables
+        """
+        with self.ingest_lock(csv_path):
+            korpus_dir = self.korpus_dir(csv_path)
+            previous_info = self.store_info(csv_path) or {}
+            posts, comments = self.read_csv(csv_path)
+
+            # Build the new version next to the old one and swap the directories at the end
+            tmp_dir = korpus_dir + '.tmp'
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            os.makedirs(tmp_dir)
+            info = {'version': STORE_VERSION, 'source_mtime': os.path.getmtime(csv_path),
+                    'rows': {'posts': 0, 'comments': 0}, 'batches': []}
+            self.write_batch(tmp_dir, info, posts, comments, source=csv_path)
+            TextIndex.build(posts).write(os.path.join(tmp_dir, TEXT_INDEX_FILE))
+            TermCounts.build(posts, comments).write(os.path.join(tmp_dir, TERM_COUNTS_FILE))
+            info['summary'] = self.summarize(posts, info)
+            self.write_store_info(tmp_dir, info)
+
+            old_dir = korpus_dir + '.old'
+            shutil.rmtree(old_dir, ignore_errors=True)
+            if os.path.exists(korpus_dir):
+                os.replace(korpus_dir, old_dir)
+            os.replace(tmp_dir, korpus_dir)
+            shutil.rmtree(old_dir, ignore_errors=True)
+
+            batch_paths = dict.fromkeys(batch['source'] for batch in previous_info.get('batches', [])[1:])
+            for batch_path in batch_paths:
+                if os.path.exists(batch_path):
+                    self.append(csv_path, batch_path)
+            return korpus_dir
+
+    def append(self, csv_path, batch_path):
+        """
+        Appends a scrape batch (a CSV in the korpus format) to the korpus of csv_path.
+        Posts and comments that are already stored are skipped, only new files are written.
+            returns: number of appended posts and comments
+        """
+        with self.ingest_lock(csv_path):
+            self.ensure_ingested(csv_path)
+            info = self.store_info(csv_path)
+            posts, comments = self.read_csv(batch_path)
+
+            stored_posts = self.read_table(csv_path, 'posts', columns=POST_KEY + PARTITION_COLUMNS,
+                                           video_ids=set(posts['video_id']) | set(comments['video_id']))
+            posts = posts.drop_duplicates(POST_KEY)
+            posts = posts[~posts['video_id'].isin(stored_posts['video_id'])]
+
+            comment_key = [c for c in COMMENT_KEY if c in comments.columns]
+            stored_comments = self.read_table(csv_path, 'comments', columns=comment_key, video_ids=set(comments['video_id']))
+            comments = comments.drop_duplicates(comment_key)
+            comments = comments.merge(stored_comments.drop_duplicates(), on=comment_key, how='left', indicator=True)
+            comments = comments[comments.pop('_merge') == 'left_only']
+
+            # The new files are not read before store.json lists their batch. Everything
+            # derived from the batch is built first, then swapped in together with store.json
+            korpus_dir = self.korpus_dir(csv_path)
+            self.write_batch(korpus_dir, info, posts, comments, source=batch_path, stored_posts=stored_posts)
+            text_index = self.read_text_index(csv_path).merge(TextIndex.build(posts))
+            term_counts = self.read_term_counts(csv_path).merge(TermCounts.build(posts, comments))
+            summary_columns = [c for c in self.table_schema(self.table_dir(csv_path, 'posts')).names if c in SUMMARY_COLUMNS]
+            info['summary'] = self.summarize(self.read_table(csv_path, 'posts', columns=summary_columns, info=info), info)
+
+            text_index.write(os.path.join(korpus_dir, TEXT_INDEX_FILE + '.tmp'))
+            term_counts.write(os.path.join(korpus_dir, TERM_COUNTS_FILE + '.tmp'))
+            for file_name in (TEXT_INDEX_FILE, TERM_COUNTS_FILE):
+                os.replace(os.path.join(korpus_dir, file_name + '.tmp'), os.path.join(korpus_dir, file_name))
+            self.write_store_info(korpus_dir, info)
+            return len(posts), len(comments)
+
+    def read_text_index(self, csv_path):
+        return TextIndex.read(os.path.join(self.korpus_dir(csv_path), TEXT_INDEX_FILE))
+
+    def read_term_counts(self, csv_path):
+        return TermCounts.read(os.path.join(self.korpus_dir(csv_path), TERM_COUNTS_FILE))
+
+    def summarize(self, posts, info):
+        """
+        Counts, distinct values and ranges of a korpus for the filter widgets.
+        The ranges are kept per platform / hashtag (or profile) / media type, so the
+        widgets can narrow them down to the selected hashtags and platforms.
+        """
+        group_column = 'canonical_hashtag' if 'canonical_hashtag' in posts.columns else 'profile_name'
+        cell_columns = ['platform', group_column, 'media_type']
+        posts = posts.reset_index(drop=True)
+        stats = PostStats.build(posts, RANGE_COLUMNS)
+        cells = []
+        for keys, cell in posts.groupby(cell_columns, sort=False, observed=True, dropna=False):
+            platform, group, media_type = [None if pd.isna(key) else str(key) for key in keys]
+            dates = cell['upload_date'].dropna()
+            cells.append({
+                'platform': platform,
+                'group': group,
+                'media_type': media_type,
+                'posts': len(cell),
+                'upload_date': [str(dates.min().date()), str(dates.max().date())] if len(dates) else None,
+                **{column: list(stats.bounds(column, cell.index.to_numpy()))
+                   for column in RANGE_COLUMNS if column in cell.columns and cell[column].notna().any()},
+                'channels': cell['channel_name'].dropna().astype(str).unique().tolist(),
+            })
+        return {
+            'rows': info['rows']['posts'] + info['rows']['comments'],
+            'posts': info['rows']['posts'],
+            'comments': info['rows']['comments'],
+            'group_column': group_column,
+            'groups': posts[group_column].dropna().astype(str).unique().tolist(),
+            'platforms': posts['platform'].dropna().astype(str).unique().tolist(),
+            'cells': cells,
+        }
+
+    def build_manifest(self, sources=KORPUS_SOURCES):
+        """
+        Ingests the korpora that are missing or stale and writes the manifest of
+        all korpora with data to database/columnar/manifest.json.
+            returns: {korpus name: {'csv_path': ..., counts, distinct values, ranges}}
+        """
+        manifest = {}
+        for name, csv_path in sources.items():
+            if not os.path.exists(csv_path) and self.store_info(csv_path) is None:
+                continue
+            self.ensure_ingested(csv_path)
+            manifest[name] = {'csv_path': csv_path, **self.store_info(csv_path)['summary']}
+
+        manifest_path = os.path.join(self.store_dir, MANIFEST_FILE)
+        if not os.path.exists(manifest_path) or self.read_manifest() != manifest:
+            os.makedirs(self.store_dir, exist_ok=True)
+            with open(manifest_path + '.tmp', 'w') as file:
+                json.dump(manifest, file, indent=4, ensure_ascii=False)
+            os.replace(manifest_path + '.tmp', manifest_path)
+        return manifest
+
+    def read_manifest(self):
+        with open(os.path.join(self.store_dir, MANIFEST_FILE), 'r') as file:
+            return json.load(file)
+
+    def read_csv(self, csv_path):
+        """
+        Reads a korpus CSV into typed posts and comments tables.
+        """
+        dataframe = pd.read_csv(csv_path, low_memory=False, dtype={column: str for column in ID_COLUMNS})
+        for column in dataframe.columns:
+            if dataframe[column].dtype == object:
+                dataframe[column] = self.normalize_object_column(dataframe[column])
+        for column in SENTIMENT_COLUMNS:
+            if column in dataframe.columns:
+                dataframe = dataframe.join(self.parse_sentiment_column(dataframe[column]))
+
+        posts, comments = self.split_posts_comments(dataframe)
+        if 'hashtag' in posts.columns:
+            # Parsed hashtag lists and the hashtag the plots and filters group by (utils/hashtags.py)
+            posts = posts.assign(**hashtag_columns(posts['hashtag']))
+        return apply_schema(posts, POSTS_SCHEMA), apply_schema(comments, COMMENTS_SCHEMA)
+
+    def split_posts_comments(self, dataframe):
+        """
+        Post rows are the rows without a comment_id, they keep the post columns.
+        Comment rows keep video_id and the comment columns.
+        """
+        is_comment = dataframe['comment_id'].notna()
+        comment_columns = ['video_id'] + [c for c in COMMENT_COLUMNS if c in dataframe.columns]
+        post_columns = [c for c in dataframe.columns if c not in comment_columns or c == 'video_id']
+
+        posts = dataframe.loc[~is_comment, post_columns].drop_duplicates().reset_index(drop=True)
+        comments = dataframe.loc[is_comment, comment_columns].reset_index(drop=True)
+        return posts, comments
+
+    def partition_keys(self, posts, months=False):
+        """
+        Partition values (platform, hashtag or profile, upload month) of each post.
+            months: split the large platform / hashtag partitions of a batch by upload month,
+                    otherwise the month is left out (enough to find the partitions of a post)
+        """
+        group_column = 'hashtag' if 'hashtag' in posts.columns else 'profile_name'
+        group = posts[group_column].astype(object)
+        group = group.mask(group.astype(str).str.startswith('['), MULTIPLE_GROUP)
+        keys = pd.DataFrame({
+            'p_platform': posts['platform'].astype(object).fillna(UNKNOWN_PARTITION).astype(str),
+            'p_group': group.fillna(UNKNOWN_PARTITION).astype(str),
+        }, index=posts.index)
+        if not months:
+            return keys
+        sizes = keys.groupby(['p_platform', 'p_group'])['p_group'].transform('size')
+        keys['p_month'] = posts['upload_date'].dt.strftime('%Y-%m').fillna(UNKNOWN_PARTITION).where(
+            sizes > MONTH_PARTITION_POSTS, ALL_MONTHS_PARTITION)
+        return keys
+
+    def write_batch(self, korpus_dir, info, posts, comments, source, stored_posts=None):
+        """
+        Writes the posts and comments of a batch as new files into their partitions
+        and records the batch in info. Comments go to the partition of their post.
+        """
+        batch_id = f"{len(info['batches']):04d}"
+        posts = pd.concat([posts, self.partition_keys(posts, months=True)], axis=1)
+        post_keys = pd.concat([stored_posts, posts[POST_KEY + PARTITION_COLUMNS]]).drop_duplicates('video_id')
+        comments = comments.merge(post_keys, on='video_id', how='left')
+        comments[PARTITION_COLUMNS] = comments[PARTITION_COLUMNS].fillna(UNKNOWN_PARTITION)
+
+        for table, dataframe in (('posts', posts), ('comments', comments)):
+            dataframe = dataframe.reset_index(drop=True)
+            dataframe[ROW_COLUMN] = np.arange(len(dataframe), dtype='int64') + info['rows'][table]
+            self.write_partitions(dataframe, os.path.join(korpus_dir, table), batch_id)
+            info['rows'][table] += len(dataframe)
+        info['batches'].append({'id': batch_id, 'source': source, 'posts': len(posts), 'comments': len(comments)})
+
+    def write_partitions(self, dataframe, table_dir, batch_id):
+        data_columns = [c for c in dataframe.columns if c not in PARTITION_COLUMNS]
+        schema = self.table_schema(table_dir)
+        if schema is None:
+            schema = pa.Schema.from_pandas(dataframe[data_columns], preserve_index=False)
+        else:
+            # Appended batches are written with the types of the stored files
+            dataframe = dataframe.reindex(columns=schema.names + PARTITION_COLUMNS)
+            data_columns = schema.names
+        if dataframe.empty:
+            if self.table_files(table_dir):
+                return
+            # An empty table still needs one file for its columns
+            dataframe = dataframe.assign(**{column: UNKNOWN_PARTITION for column in PARTITION_COLUMNS})
+            partitions = [((UNKNOWN_PARTITION,) * len(PARTITION_COLUMNS), dataframe)]
+        else:
+            partitions = dataframe.groupby(PARTITION_COLUMNS, sort=False)
+        for values, partition in partitions:
+            partition_dir = os.path.join(table_dir, *[f'{column}={quote(value, safe="")}' for column, value in zip(PARTITION_COLUMNS, values)])
+            os.makedirs(partition_dir, exist_ok=True)
+            table = pa.Table.from_pandas(partition[data_columns], schema=schema, preserve_index=False)
+            pq.write_table(table, os.path.join(partition_dir, f'part-{batch_id}-0.parquet'))
+
+    def table_files(self, table_dir, batch_ids=None):
+        files = sorted(glob.glob(os.path.join(table_dir, '**', 'part-*.parquet'), recursive=True))
+        if batch_ids is not None:
+            files = [f for f in files if os.path.basename(f).split('-')[1] in batch_ids]
+        return files
+
+    def table_schema(self, table_dir):
+        files = self.table_files(table_dir)
+        return pq.read_schema(files[0]) if files else None
+
+    def dataset(self, csv_path, table, info=None):
+        """
+        The files of all completed batches of a table as a hive partitioned dataset.
+            info: the batches of this store info instead of the ones of store.json
+        """
+        info = info or self.store_info(csv_path)
+        batch_ids = {batch['id'] for batch in info['batches']}
+        table_dir = self.table_dir(csv_path, table)
+        partitioning = ds.partitioning(pa.schema([(column, pa.string()) for column in PARTITION_COLUMNS]), flavor='hive')
+        return ds.dataset(self.table_files(table_dir, batch_ids), format='parquet',
+                          partitioning=partitioning, partition_base_dir=table_dir)
+
+    def load(self, csv_path, corpus_name=None, text_columns=False):
+        """
+        Returns the korpus as a Corpus, ingesting the CSV first if needed.
+        The long text columns are only loaded with text_columns=True.
+        """
+        self.ensure_ingested(csv_path)
+        name = corpus_name or os.path.splitext(os.path.basename(csv_path))[0]
+        tables = {}
+        for table, skipped_columns in (('posts', POST_TEXT_COLUMNS), ('comments', COMMENT_TEXT_COLUMNS)):
+            columns = None
+            if not text_columns:
+                columns = [c for c in self.table_schema(self.table_dir(csv_path, table)).names
+                           if c not in skipped_columns and c != ROW_COLUMN]
+            tables[table] = self.read_table(csv_path, table, columns=columns)
+        return Corpus(name, tables['posts'], tables['comments'], store=self, csv_path=csv_path,
+                      text_index=self.read_text_index(csv_path), term_counts=self.read_term_counts(csv_path))
+
+    def read_table(self, csv_path, table, columns=None, video_ids=None, partitions=None, info=None):
+        """
+        Reads a korpus table, optionally only some columns and the rows of some video_ids.
+        partitions ({partition column: values}) limits the files that are opened.
+        """
+        dataset = self.dataset(csv_path, table, info)
+        if columns is None:
+            columns = [c for c in dataset.schema.names if c not in PARTITION_COLUMNS and c != ROW_COLUMN]
+        filters = []
+        if video_ids is not None:
+            if isinstance(video_ids, str):
+                video_ids = [video_ids]
+            filters.append(ds.field('video_id').isin(pa.array(sorted({str(v) for v in video_ids}), pa.string())))
+        for column, values in (partitions or {}).items():
+            filters.append(ds.field(column).isin(pa.array(sorted(values), pa.string())))
+        filter_expression = reduce(operator.and_, filters) if filters else None
+
+        dataframe = dataset.to_table(columns=columns + [ROW_COLUMN], filter=filter_expression).to_pandas()
+        dataframe = dataframe.sort_values(ROW_COLUMN).drop(columns=ROW_COLUMN).reset_index(drop=True)
+        # Parquet gives None for missing strings, keep NaN like read_csv did
+        for column in dataframe.columns:
+            if dataframe[column].dtype == object:
+                dataframe[column] = dataframe[column].fillna(np.nan)
+        return dataframe
+
+    def normalize_object_column(self, column):
+        """
+        Parquet needs one type per column. Columns that mix strings with numbers
+        (e.g. 'No subscribers count' next to floats) are stored as strings,
+        boolean columns with missing values are kept as booleans.
+        """
+        values = column.dropna()
+        if values.map(type).eq(str).all() or values.map(type).eq(bool).all():
+            return column
+        return column.where(column.isna(), column.astype(str))
+
+    def parse_sentiment_column(self, column):
+        """
+        Splits a stringified sentiment tuple column into
+            <column>_label: category (positive|negative|neutral)
+            <column>_positive/_negative/_neutral: float32 probabilities
+        The strings are matched with regular expressions, no eval of the data.
+        """
+        text = column.astype('string')
+        parsed = pd.DataFrame(index=column.index)
+        label = text.str.extract(r"^\(\['(\w+)'\]", expand=False).str.lower()
+        parsed[f'{column.name}_label'] = pd.Categorical(label, categories=SENTIMENT_LABELS)
+        for sentiment in SENTIMENT_LABELS:
+            score = text.str.extract(rf"\['{sentiment}',\s*([-+0-9.eE]+)\]", expand=False)
+            parsed[f'{column.name}_{sentiment}'] = pd.to_numeric(score, errors='coerce').astype('float32')
+        return parsed
+
+
+def main(args):
+    store = CorpusStore()
+    if args[:1] == ['append']:
+        csv_path, batch_paths = args[1], args[2:]
+        for batch_path in batch_paths:
+            posts_count, comments_count = store.append(csv_path, batch_path)
+            print(f"Appended {batch_path} -> {store.korpus_dir(csv_path)}: {posts_count} posts, {comments_count} comments")
+    elif args:
+        for csv_path in args:
+            if not os.path.exists(csv_path):
+                print(f"Skipping {csv_path}: file not found")
+                continue
+            print(f"Ingesting {csv_path} -> {store.ingest(csv_path)}")
+    else:
+        for csv_path in KORPUS_SOURCES.values():
+            if os.path.exists(csv_path):
+                print(f"Ingesting {csv_path} -> {store.ingest(csv_path)}")
+    manifest = store.build_manifest()
+    print(f"Manifest {os.path.join(store.store_dir, MANIFEST_FILE)}: {', '.join(manifest)}")
+
+
+if __name__ == '__main__':
+    # python -m utils.corpus_store [database/<korpus>.csv ...]
+    # python -m utils.corpus_store append database/<korpus>.csv <batch>.csv [<batch>.csv ...]
+    # Without arguments every korpus of KORPUS_SOURCES is ingested
+    main(sys.argv[1:])
@@ -0,0 +1,61 @@
+# import modules
+import numpy as np
+import pandas as pd
+
+
+class DateIndex():
+    """
+    The posts of a korpus sorted by upload date, a date range resolves by binary
+    search to a contiguous run of posts. The comments are grouped by post with row
+    offsets, so the comment rows of a run of posts are slices as well.
+    """
+
+    def __init__(self, order, dates, comment_order, comment_offsets) -> None:
+        self.order = order                      # post positions sorted by upload date, posts without date last
+        self.dates = dates                      # their upload dates (datetime64[ns]), without the missing ones
+        self.comment_order = comment_order      # comment positions grouped by post position
+        self.comment_offsets = comment_offsets  # comments of post i: comment_order[offsets[i]:offsets[i + 1]]
+
+    @classmethod
+    def build(cls, posts, comments):
+        upload_date = pd.to_datetime(posts['upload_date']).to_numpy(dtype='datetime64[ns]')
+        order = np.argsort(upload_date, kind='stable')  # NaT sorts last
+        dated = int((~np.isnat(upload_date)).sum())
+
+        # Position of the post of every comment, comments of unknown posts are left out
+        post_positions = pd.Series(np.arange(len(posts)), index=posts['video_id'].astype(str).to_numpy())
+        post_positions = post_positions[~post_positions.index.duplicated()]
+        comment_post = comments['video_id'].astype(str).map(post_positions).to_numpy(dtype='float64', na_value=np.nan)
+        known = np.flatnonzero(~np.isnan(comment_post))
+        comment_order = known[np.argsort(comment_post[known], kind='stable')]
+        comment_offsets = np.searchsorted(comment_post[comment_order], np.arange(len(posts) + 1), side='left')
+        return cls(order, upload_date[order[:dated]], comment_order, comment_offsets)
+
+    def post_range(self, start_date, end_date):
+        """
+        Positions of the posts uploaded between start_date and end_date (both included),
+        sorted by upload date.
+        """
+        start = np.datetime64(pd.to_datetime(start_date), 'ns')
+        end = np.datetime64(pd.to_datetime(end_date), 'ns')
+        low = np.searchsorted(self.dates, start, side='left')
+        high = np.searchsorted(self.dates, end, side='right')
+        return self.order[low:max(low, high)]
+
+    def mask(self, start_date, end_date):
+        """
+        Boolean array over the posts, True for the posts uploaded in the date range.
+        """
+        mask = np.zeros(len(self.order), dtype=bool)
+        mask[self.post_range(start_date, end_date)] = True
+        return mask
+
+    def comment_rows(self, post_positions):
+        """
+        Positions of the comments of the given posts.
+        """
+        post_positions = np.asarray(post_positions, dtype='int64')
+        if len(post_positions) == 0:
+            return np.empty(0, dtype='int64')
+        starts, ends = self.comment_offsets[post_positions], self.comment_offsets[post_positions + 1]
+        return np.concatenate([self.comment_order[start:end] for start, end in zip(starts, ends)])
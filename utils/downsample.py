@@ -0,0 +1,64 @@
+# import modules
+import os
+import numpy as np
+
+# Above this number of points a chart over posts switches to the large-data mode
+# (downsampled WebGL traces), set with the ALSO_LARGE_CHART_POINTS environment variable
+LARGE_CHART_POINTS = int(os.environ.get('ALSO_LARGE_CHART_POINTS', 5000))
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Positions of the points kept by Largest-Triangle-Three-Buckets: the first and
+    the last point and, in each of n_out - 2 buckets, the point that spans the
+    largest triangle with the point kept before and the mean of the next bucket.
+        x, y: numeric arrays of the series, sorted by x
+        returns: sorted np.array of positions into x and y
+    """
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        # Too few points for a bucket: the highest point, or the first and the last point
+        return np.array([int(y.argmax())] if n_out == 1 else [0, n - 1][:max(n_out, 0)], dtype='int64')
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype('int64')
+    kept = np.empty(n_out, dtype='int64')
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_start, next_end = end, (edges[bucket + 2] if bucket + 2 < len(edges) else n)
+        mean_x = x[next_start:next_end].mean()
+        mean_y = y[next_start:next_end].mean()
+        # Twice the triangle area, the constant factor does not change the argmax
+        areas = np.abs((x[previous] - mean_x) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (mean_y - y[previous]))
+        previous = start + int(areas.argmax())
+        kept[bucket + 1] = previous
+    return kept
+
+
+def point_budgets(sizes, max_points):
+    """
+    Splits max_points over series of the given sizes. Each series keeps up to 3 points
+    (first, last and one in between), fewer if there are too many series for that, and
+    the rest of the budget is split in proportion to the size of the series. The
+    budgets add up to max_points at most.
+    """
+    sizes = np.asarray(sizes, dtype='int64')
+    if sizes.sum() <= max_points:
+        return sizes
+    for minimum in (3, 2, 1, 0):
+        budgets = np.minimum(sizes, minimum)
+        if budgets.sum() <= max_points:
+            break
+    rest = sizes - budgets
+    shares = rest * ((max_points - budgets.sum()) / rest.sum())
+    budgets = budgets + np.floor(shares).astype('int64')
+    # The points left over by rounding down go to the series with the largest remainders
+    left_over = int(max_points - budgets.sum())
+    budgets[np.argsort(np.floor(shares) - shares, kind='stable')[:left_over]] += 1
+    return budgets
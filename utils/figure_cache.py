@@ -0,0 +1,74 @@
+# import modules
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+import plotly.graph_objects as go
+import plotly.io as pio
+
+
+class FigureCache():
+    """
+    Plotly figures of the Plots page serialized as JSON, keyed by the hash of the
+    filter state and the parameters of the chart (granularity, metrics, ...),
+    shared by all sessions. A rerun that does not change the inputs of a chart
+    gets its figure from here instead of building it again.
+    """
+
+    def __init__(self, max_entries) -> None:
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # key -> figure JSON, None for charts without data
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def filter_key(corpus, spec):
+        # Filter state of a figure: the korpus version and the FilterSpec hash
+        return [corpus.name, corpus.store.mtime(corpus.csv_path), spec.key()]
+
+    @staticmethod
+    def key(chart, filter_key, params):
+        canonical = json.dumps([chart, filter_key, params], sort_keys=True, default=str)
+        return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+    def get(self, chart, filter_key, params, build):
+        """
+        The figure of the chart, build() makes it if it is not cached.
+            build: returns a go.Figure, or None if there is no data to plot
+        """
+        key = self.key(chart, filter_key, params)
+        with self.lock:
+            if key in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                spec = self.entries[key]
+                # The cached JSON was validated when the figure was built
+                return None if spec is None else go.Figure(json.loads(spec), _validate=False)
+
+        fig = build()
+        spec = None if fig is None else pio.to_json(fig, validate=False)
+        with self.lock:
+            self.misses += 1
+            self.entries[key] = spec
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return fig
+
+    def stats(self):
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+            }
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+# Process wide instance, shared by all sessions
+figure_cache = FigureCache(max_entries=int(os.environ.get('ALSO_FIGURE_CACHE_ENTRIES', 128)))
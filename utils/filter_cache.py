@@ -0,0 +1,88 @@
+# import modules
+import threading
+from collections import OrderedDict
+
+
+class FilterResultCache():
+    """
+    Filter results (boolean masks over the posts of a korpus) keyed by the hash of
+    the FilterSpec, shared by all sessions of the server.
+
+    A spec that is not cached but narrower than a cached one (e.g. a slider moved
+    inwards, one more hashtag deselected) is refined from the cached subset: only
+    its posts are filtered, and only on the dimensions that changed.
+    """
+
+    def __init__(self, max_entries) -> None:
+        self.max_entries = max_entries
+        self.entries = {}  # (corpus name, korpus mtime) -> OrderedDict(spec key -> (spec, mask))
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.refinements = 0
+        self.misses = 0
+
+    def get(self, corpus, spec, compute):
+        """
+        Returns the mask of spec, calling compute(corpus, spec, within=None, dimensions=...)
+        for results that are not cached. The returned masks are shared and read only.
+        """
+        korpus_key = (corpus.name, corpus.store.mtime(corpus.csv_path))
+        spec_key = spec.key()
+        with self.lock:
+            # Drop the results of older versions of this korpus
+            for stale_key in [k for k in self.entries if k[0] == corpus.name and k != korpus_key]:
+                del self.entries[stale_key]
+            results = self.entries.setdefault(korpus_key, OrderedDict())
+            if spec_key in results:
+                self.hits += 1
+                results.move_to_end(spec_key)
+                return results[spec_key][1]
+            broader = self.broader_result(results, spec)
+
+        # Computed outside the lock, a keyword search may read texts from disk
+        if broader is None:
+            mask = compute(corpus, spec)
+        else:
+            broader_mask, dimensions = broader
+            mask = compute(corpus, spec, within=broader_mask, dimensions=dimensions)
+        mask.flags.writeable = False
+
+        with self.lock:
+            if broader is None:
+                self.misses += 1
+            else:
+                self.refinements += 1
+            results[spec_key] = (spec, mask)
+            results.move_to_end(spec_key)
+            while len(results) > self.max_entries:
+                results.popitem(last=False)
+        return mask
+
+    def broader_result(self, results, spec):
+        """
+        The cached result with the fewest posts among those of broader specs.
+            returns: (mask, dimensions that differ) or None
+        """
+        best = None
+        for cached_spec, mask in results.values():
+            dimensions = spec.narrowing(cached_spec)
+            if dimensions is None:
+                continue
+            count = int(mask.sum())
+            if best is None or count < best[0]:
+                best = (count, mask, dimensions)
+        return None if best is None else best[1:]
+
+    def stats(self):
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'refinements': self.refinements,
+                'misses': self.misses,
+                'entries': sum(len(results) for results in self.entries.values()),
+                'max_entries_per_korpus': self.max_entries,
+            }
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
@@ -0,0 +1,247 @@
+# import modules
+import os
+import json
+import hashlib
+from dataclasses import dataclass, field, asdict
+import numpy as np
+import pandas as pd
+
+# Custom imports
+from utils.keyword_matcher import KeywordMatcher
+from utils.filter_cache import FilterResultCache
+from utils.bitmap_index import INSTAGRAM_TYPE
+
+# Filter dimensions of a FilterSpec, the keyword and date dimensions span several fields
+SELECTION_FIELDS = ['groups', 'platforms', 'media_types', 'instagram_types', 'channels', 'sentiments']
+RANGE_FIELDS = ['views', 'subscribers', 'likes', 'comments']
+DIMENSIONS = SELECTION_FIELDS + RANGE_FIELDS + ['dates', 'keywords', 'video_id']
+
+
+@dataclass
+class FilterSpec:
+    """
+    The filter panel selection, filled in by the widgets of the layouts.
+    Empty selections and None ranges do not filter.
+    """
+    corpus: str = None
+    group_column: str = 'canonical_hashtag' # profile_name for the influencer korpus
+    groups: list = field(default_factory=list)
+    platforms: list = field(default_factory=list)
+    media_types: list = field(default_factory=list)        # YouTube: shorts, video
+    instagram_types: list = field(default_factory=list)    # Instagram: Posts, Reels
+    start_date: object = None
+    end_date: object = None
+    channels: list = field(default_factory=list)
+    keywords: list = field(default_factory=list)
+    keyword_columns: list = field(default_factory=list)    # title, video_description, transcript_german
+    keyword_mode: str = 'any'                               # any or all of the keywords
+    whole_word: bool = False
+    views: tuple = None
+    subscribers: tuple = None
+    likes: tuple = None
+    comments: tuple = None
+    sentiments: list = field(default_factory=list)          # positive, neutral, negative
+    video_id: str = ''
+
+    @property
+    def active_keywords(self):
+        """
+        The entered keywords without blanks, an empty text input gives [''] which does not filter.
+        """
+        return [keyword.strip() for keyword in self.keywords if keyword.strip()]
+
+    def value_range(self, name):
+        """
+        (low, high) of a slider or of the dates, None if it does not filter.
+        """
+        value_range = (self.start_date, self.end_date) if name == 'dates' else getattr(self, name)
+        if value_range is None or None in value_range:
+            return None
+        return tuple(value_range)
+
+    def keyword_filter(self):
+        """
+        The keyword search in canonical form, None if it does not filter.
+        """
+        if not self.active_keywords or not self.keyword_columns:
+            return None
+        return (sorted({keyword.lower() for keyword in self.active_keywords}), sorted(self.keyword_columns),
+                self.keyword_mode, self.whole_word)
+
+    def key(self):
+        """
+        Hash of the filter state, equal for specs that select the same posts
+        (the order of multiselect values and keywords does not matter).
+        """
+        state = asdict(self)
+        for name in SELECTION_FIELDS:
+            state[name] = sorted(map(str, state[name]))
+        for name in ['keywords', 'keyword_columns', 'keyword_mode', 'whole_word']:
+            del state[name]
+        state['keywords'] = self.keyword_filter()
+        text = json.dumps(state, sort_keys=True, default=str)
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def narrowing(self, other):
+        """
+        Compares with a broader spec: if every post selected by this spec is also
+        selected by other, returns the dimensions that differ, otherwise None.
+        """
+        if (self.corpus, self.group_column) != (other.corpus, other.group_column):
+            return None
+        changed = []
+        for name in SELECTION_FIELDS:
+            values, other_values = set(getattr(self, name)), set(getattr(other, name))
+            if values == other_values:
+                continue
+            if other_values and not (values and values <= other_values):
+                return None
+            changed.append(name)
+
+        for name in RANGE_FIELDS + ['dates']:
+            value_range, other_range = self.value_range(name), other.value_range(name)
+            if value_range == other_range:
+                continue
+            if other_range is not None and (value_range is None or value_range[0] < other_range[0]
+                                            or value_range[1] > other_range[1]):
+                return None
+            changed.append(name)
+
+        keywords, other_keywords = self.keyword_filter(), other.keyword_filter()
+        if keywords != other_keywords:
+            if other_keywords is not None:
+                if keywords is None or keywords[1:] != other_keywords[1:]:
+                    return None
+                # More keywords narrow an 'all' search, fewer keywords narrow an 'any' search
+                words, other_words = set(keywords[0]), set(other_keywords[0])
+                if not (words >= other_words if self.keyword_mode == 'all' else words <= other_words):
+                    return None
+            changed.append('keywords')
+
+        if self.video_id != other.video_id:
+            if other.video_id != '':
+                return None
+            changed.append('video_id')
+        return changed
+
+
+class FilterEngine():
+    """
+    Compiles a FilterSpec into one boolean mask over the typed posts table, the
+    filtered posts are materialized once instead of after every filter step.
+    """
+
+    def __init__(self, result_cache=None) -> None:
+        self.result_cache = result_cache
+
+    def compile(self, corpus, spec, dimensions=DIMENSIONS):
+        """
+        Returns the predicates of the active filters of the given dimensions. Each maps
+        (posts rows, their positions in corpus.posts or None for all posts) to a boolean array.
+        The keyword predicate is left out, it needs the text columns (see mask).
+        """
+        predicates = []
+        # The multiselects and checkboxes are combined on the packed bitmaps of corpus.bitmaps
+        selections = [(column, getattr(spec, name)) for name, column in (
+            ('groups', spec.group_column), ('platforms', 'platform'), ('media_types', 'media_type'),
+            ('instagram_types', INSTAGRAM_TYPE), ('channels', 'channel_name'),
+            ('sentiments', 'german_sentiment_transcript_label')) if getattr(spec, name) and name in dimensions]
+        if selections:
+            predicates.append(self.bitmap_select(corpus.bitmaps, selections))
+        if spec.value_range('dates') is not None and 'dates' in dimensions:
+            predicates.append(self.date_between(corpus.date_index, spec.start_date, spec.end_date))
+        # The sliders run on the int64 counts of corpus.post_stats
+        for name, column in (('likes', 'like_count'), ('comments', 'comments_count'),
+                             ('views', 'views_count'), ('subscribers', 'subscribers_count')):
+            if spec.value_range(name) is not None and name in dimensions:
+                predicates.append(self.between(corpus.post_stats, column, spec.value_range(name)))
+        if spec.video_id != '' and 'video_id' in dimensions:
+            predicates.append(lambda posts, positions: (posts['video_id'] == spec.video_id).to_numpy(dtype=bool, na_value=False))
+        return predicates
+
+    def mask(self, corpus, spec, within=None, dimensions=DIMENSIONS):
+        """
+        Boolean array over corpus.posts, True for the posts passing all filters.
+        With within (the mask of a broader spec) only those posts are filtered,
+        on the dimensions in which the specs differ.
+        """
+        posts = corpus.posts
+        positions = np.arange(len(posts)) if within is None else np.flatnonzero(within)
+        rows = posts if within is None else posts.iloc[positions]
+        selected = np.ones(len(rows), dtype=bool)
+        for predicate in self.compile(corpus, spec, dimensions):
+            selected &= predicate(rows, None if within is None else positions)
+
+        keywords = spec.active_keywords
+        if keywords and spec.keyword_columns and 'keywords' in dimensions and selected.any():
+            selected &= self.keyword_mask(corpus, rows, selected, spec)
+
+        mask = np.zeros(len(posts), dtype=bool)
+        mask[positions] = selected
+        return mask
+
+    def keyword_mask(self, corpus, rows, selected, spec):
+        """
+        Keyword search over the selected rows, the other rows are left False.
+        """
+        keywords = spec.active_keywords
+        exact = False
+        if corpus.text_index is not None:
+            # The posting lists give the matching posts, only phrases and #tags are checked in the texts
+            video_ids, exact = corpus.text_index.search(keywords, spec.keyword_columns,
+                                                        mode=spec.keyword_mode, whole_word=spec.whole_word)
+            if video_ids is not None:
+                selected = selected & rows['video_id'].isin(video_ids).to_numpy(dtype=bool)
+        if exact or not selected.any():
+            return selected
+
+        # Caption and transcript texts are only read for the posts left by the other filters
+        candidates = np.flatnonzero(selected)
+        text_columns = [column for column in spec.keyword_columns if column not in rows.columns]
+        texts = corpus.with_text(rows.iloc[candidates], text_columns)
+        matcher = KeywordMatcher(keywords, mode=spec.keyword_mode, whole_word=spec.whole_word)
+        selected = np.zeros(len(rows), dtype=bool)
+        selected[candidates] = matcher.mask(texts, spec.keyword_columns)
+        return selected
+
+    def apply(self, corpus, spec):
+        """
+        Returns the filtered posts, a new frame with a fresh index.
+        """
+        if self.result_cache is not None:
+            mask = self.result_cache.get(corpus, spec, self.mask)
+        else:
+            mask = self.mask(corpus, spec)
+        filtered_df = corpus.posts[mask].reset_index(drop=True)
+        if spec.instagram_types:
+            filtered_df['media_type'] = self.instagram_type(filtered_df)
+        return filtered_df
+
+    @staticmethod
+    def instagram_type(posts):
+        return np.where(posts['is_video'].astype(bool), 'Reels', 'Posts')
+
+    @staticmethod
+    def bitmap_select(bitmaps, selections):
+        def predicate(posts, positions):
+            mask = bitmaps.mask(selections)
+            return mask if positions is None else mask[positions]
+        return predicate
+
+    @staticmethod
+    def between(post_stats, column, value_range):
+        low, high = value_range
+        return lambda posts, positions: post_stats.between(column, low, high, positions)
+
+    @staticmethod
+    def date_between(date_index, start_date, end_date):
+        # Binary search in the posts sorted by upload date
+        def predicate(posts, positions):
+            mask = date_index.mask(start_date, end_date)
+            return mask if positions is None else mask[positions]
+        return predicate
+
+
+# Shared by both layouts and all sessions, the number of cached results per korpus can be
+# set with the ALSO_FILTER_CACHE_ENTRIES environment variable
+filter_engine = FilterEngine(result_cache=FilterResultCache(max_entries=int(os.environ.get('ALSO_FILTER_CACHE_ENTRIES', 64))))
@@ -0,0 +1,110 @@
+# import modules
+import os
+import sys
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Custom imports
+from utils import presets
+from utils.corpus_cache import corpus_cache
+from utils.corpus_manifest import corpus_manifest
+from utils.filter_engine import filter_engine
+
+EXPORT_FORMATS = ['csv', 'parquet']
+
+
+def export_presets(corpus_name, csv_path, jobs, output_dir, export_format):
+    """
+    Runs in a worker process: filters the korpus with each preset and writes the
+    posts and comments of the result in the layout of the dashboard download.
+    The korpus is loaded once per worker process (corpus_cache), the jobs of a
+    korpus are sent to a worker together.
+        jobs: [(export name, filters), ...]
+        returns: [(export name, path, number of posts), ...]
+    """
+    corpus = corpus_cache.get(corpus_name, csv_path)
+    exports = []
+    for name, filters in jobs:
+        filtered_df = filter_engine.apply(corpus, presets.filter_spec(filters))
+        rows = corpus.rows(filtered_df['video_id'])
+        path = os.path.join(output_dir, f"{name}.{export_format}")
+        if export_format == 'parquet':
+            rows.to_parquet(path, index=False)
+        else:
+            rows.to_csv(path)
+        exports.append((name, path, len(filtered_df)))
+    return exports
+
+
+def export_names(preset_paths):
+    """
+    The export name of each preset file: its path relative to the common directory of
+    all presets, without .json and with '__' between the directories. Presets of the
+    same name in different directories get different exports.
+    """
+    paths = [os.path.abspath(path) for path in preset_paths]
+    base_dir = os.path.commonpath([os.path.dirname(path) for path in paths])
+    return [os.path.splitext(os.path.relpath(path, base_dir))[0].replace(os.sep, '__') for path in paths]
+
+
+def chunks(jobs, count):
+    # count chunks of about the same size, in the order of the jobs
+    size = -(-len(jobs) // count)
+    return [jobs[start:start + size] for start in range(0, len(jobs), size)]
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description="Exports the filter results of preset files without the dashboard")
+    parser.add_argument("presets", nargs="+", help="preset JSON files (Save Presets in the filter panel)")
+    parser.add_argument("--output", default="exports", help="directory of the exports")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    args = parser.parse_args(args)
+
+    # Ingests new or changed korpora once, before the workers start
+    korpus_dict = corpus_manifest.refresh()
+    jobs_by_korpus = {}
+    failed = 0
+    exported_names = set()
+    for preset_path, name in zip(args.presets, export_names(args.presets)):
+        if name in exported_names:
+            print(f"Skipping {preset_path}: another preset is already exported as {name}")
+            failed += 1
+            continue
+        exported_names.add(name)
+        try:
+            with open(preset_path, 'r', encoding='utf-8') as file:
+                filters = presets.loads(file.read())
+        except (OSError, ValueError, TypeError) as e:
+            print(f"Skipping {preset_path}: {e}")
+            failed += 1
+            continue
+        if filters['corpus_select'] not in korpus_dict:
+            print(f"Skipping {preset_path}: unknown korpus {filters['corpus_select']}")
+            failed += 1
+            continue
+        jobs_by_korpus.setdefault(filters['corpus_select'], []).append((name, filters))
+
+    os.makedirs(args.output, exist_ok=True)
+    workers = max(1, args.workers or 1)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # The presets of a korpus are split over at most `workers` tasks, each task loads the korpus once
+        futures = {}
+        for corpus_name, jobs in jobs_by_korpus.items():
+            for chunk in chunks(jobs, workers):
+                future = executor.submit(export_presets, corpus_name, korpus_dict[corpus_name], chunk,
+                                         args.output, args.format)
+                futures[future] = [name for name, _ in chunk]
+        for future in as_completed(futures):
+            try:
+                for name, path, posts_count in future.result():
+                    print(f"Exported {name} -> {path}: {posts_count} posts")
+            except Exception as e:
+                print(f"Could not export {', '.join(futures[future])}: {e}")
+                failed += len(futures[future])
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    # python -m utils.filter_export presets/*.json [--output exports] [--format csv|parquet] [--workers N]
+    sys.exit(main(sys.argv[1:]))
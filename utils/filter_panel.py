@@ -0,0 +1,244 @@
+# import modules
+import datetime
+import streamlit as st
+
+# Custom imports
+from utils.corpus_cache import corpus_cache
+from utils.corpus_manifest import corpus_manifest
+from utils.filter_engine import filter_engine
+from utils import presets
+from utils.preset_controls import preset_controls, save_controls
+from utils.keyword_matcher import MATCH_MODES
+
+
+class FilterPanel():
+    """
+    The filter panel of the Social Media and Plots pages: the preset controls and the
+    korpus, hashtag, platform, date, channel, keyword, count and sentiment filters.
+    After draw() the panel holds the loaded korpus, the filter state (saved with the
+    presets), its FilterSpec and the three columns of the panel.
+    """
+
+    def __init__(self,dataframe_dict) -> None:
+        self.dataframe_dict = dataframe_dict
+        self.filters = dict(presets.DEFAULT_FILTERS)
+        self.corpus = None
+        self.spec = None
+        self.columns = None
+
+    def draw(self):
+        """
+        Draws the filter panel and filters the korpus.
+            returns: the filtered posts, None if the selection has no posts
+        """
+        # Presets are applied before the filter widgets are drawn, the download and
+        # save buttons are drawn at the end once the filters are set
+        save_col,library_col = preset_controls()
+        preset = st.session_state.get('filter_preset', presets.DEFAULT_FILTERS)
+
+        # Grid for the korpus filters 
+        first_col,second_col,third_col = st.columns(3)
+        self.columns = first_col,second_col,third_col
+        
+        korpus_names = list(self.dataframe_dict.keys())
+        corpus_select = first_col.selectbox('Select a Korpus', 
+                                options=korpus_names,
+                                index=korpus_names.index(preset['corpus_select']) if preset['corpus_select'] in korpus_names else 0,
+                                )
+        
+        self.filters['corpus_select'] = corpus_select
+
+        # The widgets are drawn from the korpus manifest (distinct values and ranges computed at ingest),
+        # the korpus itself is only read by the query at the end
+        manifest = corpus_manifest.korpus(corpus_select)
+
+        # Filters for hashtag and profile names
+        if not corpus_select == 'influencer_korpus':
+            hashtag_text = "Select the hashtags"
+        else:
+            hashtag_text = "Select the profile"
+
+        hashtags_select = first_col.multiselect(hashtag_text,
+                                          options=manifest.groups(),
+                                          default=presets.keep_options(preset['hashtags_select'], manifest.groups())
+                                          )
+
+        platform = first_col.multiselect('Select a platform', 
+                                options=["Instagram","TikTok","YouTube"],
+                                default=presets.keep_options(preset['platform'], ["Instagram","TikTok","YouTube"])
+                                )
+
+        shorts_filter,videos_filter = False,False
+        posts_filter,reels_filter = False,False
+        with first_col:
+            if 'YouTube' in platform:
+                st.caption("Youtube Filters")
+                shorts_col,videos_col = st.columns(2,vertical_alignment='top')
+                shorts_filter,videos_filter = shorts_col.checkbox('Shorts',value=preset['shorts_filter']),videos_col.checkbox('Videos',value=preset['videos_filter'])
+            if 'Instagram' in platform:
+                
+                st.caption("Instagram Filters")
+                posts_col,reels_col = st.columns(2,vertical_alignment='top')
+                posts_filter,reels_filter = posts_col.checkbox('Posts',value=preset['posts_filter']),reels_col.checkbox('Reels',value=preset['reels_filter'])
+
+            # Manifest cells (platform/hashtag/media type) of the selection, they give the widget ranges
+            media_types = [media_type for media_type, checked in (('shorts', shorts_filter), ('video', videos_filter)) if checked]
+            cells = manifest.cells(groups=hashtags_select, platforms=platform, media_types=media_types)
+            if not cells:
+                    st.warning("No posts available for the selected filters.")
+                    return None
+        
+        # Second stage filters
+        min_date, max_date = manifest.date_range(cells)
+        with second_col:
+            start_date_filter, end_date_filter = st.columns(2)
+            start_date = start_date_filter.date_input(
+                "Start date",
+                min_value=min_date,
+                max_value=max_date,
+                value=presets.clamp_date(preset['start_date'], min_date, max_date),
+            )
+            end_date = end_date_filter.date_input(
+                "End date",
+                min_value=min_date,
+                max_value=max_date,
+                value=presets.clamp_date(preset['end_date'] or max_date, min_date, max_date),
+            )
+
+        channels_select = second_col.multiselect("Select channel names",
+                                               options=manifest.channels(cells),
+                                               default=presets.keep_options(preset['channels_select'], manifest.channels(cells)),
+                                               )
+        
+        # filter data based on the keywords:
+        keywords = second_col.text_input('Enter the keywords',value=','.join(preset['keywords'])).split(',')
+        with second_col: # keyword filters
+            caption_col,title_col,transcripts_col = st.columns(3)
+            caption_filter = caption_col.checkbox('Caption',value=preset['caption_filter'])
+            title_filter = title_col.checkbox("Title",value=preset['title_filter'])
+            if 'YouTube' in platform:
+                transcripts_filter = transcripts_col.checkbox("Transcripts",value=preset['transcripts_filter'])
+            else:
+                transcripts_filter= transcripts_col.checkbox("Transcripts",disabled=True)
+            mode_col,whole_word_col = st.columns(2)
+            keyword_mode = mode_col.radio("Match", options=MATCH_MODES,
+                                          index=MATCH_MODES.index(preset['keyword_mode']),
+                                          format_func=lambda mode: f"{mode} keywords",
+                                          horizontal=True, label_visibility="collapsed")
+            whole_word = whole_word_col.checkbox("Whole words",value=preset['whole_word'])
+
+        # third stage filter        
+        with third_col:
+            # Initialize the sliders based on platform type
+            if 'YouTube' in platform or 'TikTok' in platform  or platform == []:
+                views_min, views_max = manifest.value_range(cells, 'views_count')
+                views_slider = st.slider(
+                    "Views",
+                    min_value=views_min, 
+                    max_value=views_max, 
+                    value=presets.clamp_range(preset['views_slider'], views_min, views_max)
+                )
+            else:
+                views_slider = None  # Set to None for Instagram since there are no view counts
+
+            if 'YouTube' in platform or platform == []:
+                subscribers_min, subscribers_max = manifest.value_range(cells, 'subscribers_count')
+                subscribers_slider = st.slider(
+                    "Subscribers",
+                    min_value=subscribers_min, 
+                    max_value=subscribers_max, 
+                    value=presets.clamp_range(preset['subscribers_slider'], subscribers_min, subscribers_max)
+                )
+            else:
+                subscribers_slider = None  # Set to None for platforms that don't have subscribers count
+
+            likes_min, likes_max = manifest.value_range(cells, 'like_count')
+            likes_slider = st.slider(
+                "Likes",
+                min_value=likes_min, 
+                max_value=likes_max, 
+                value=presets.clamp_range(preset['likes_slider'], likes_min, likes_max)
+            )
+
+            comments_min, comments_max = manifest.value_range(cells, 'comments_count')
+            comments_slider = st.slider(
+                "Comments",
+                min_value=comments_min, 
+                max_value=comments_max, 
+                value=presets.clamp_range(preset['comments_slider'], comments_min, comments_max)
+            )
+
+        with third_col:
+            third_col.write("Select Sentiment")
+            positive_senti_col,neutral_senti_col,negative_senti_col = st.columns(3)
+            positive_filter = positive_senti_col.checkbox('Positive Sentiment',value=preset['positive_filter'])
+            neutral_filter = neutral_senti_col.checkbox('Neutral Sentiment',value=preset['neutral_filter'])
+            negative_filter = negative_senti_col.checkbox('Negative Sentiment',value=preset['negative_filter'])
+
+        with first_col:
+            # Input for video_id
+            video_id_input = st.text_input("Enter Video ID",value=preset['video_id_input'])
+
+        # Query: filters work on the posts table, the comments follow their posts by video_id.
+        # The column types are set once at ingest (utils/corpus_schema.py)
+        self.corpus = corpus_cache.get(corpus_select, self.dataframe_dict[corpus_select])
+        # The filter state, saved with the presets
+        self.filters = {
+            **presets.DEFAULT_FILTERS,
+            'corpus_select': corpus_select,
+            'hashtags_select': hashtags_select,
+            'channels_select': channels_select,
+            'start_date': start_date,
+            'end_date': end_date,
+            'platform': platform,
+            'shorts_filter': shorts_filter,
+            'videos_filter': videos_filter,
+            'posts_filter': posts_filter,
+            'reels_filter': reels_filter,
+            'keywords': keywords,
+            'caption_filter': caption_filter,
+            'title_filter': title_filter,
+            'transcripts_filter': transcripts_filter,
+            'keyword_mode': keyword_mode,
+            'whole_word': whole_word,
+            'views_slider': views_slider,
+            'subscribers_slider': subscribers_slider,
+            'likes_slider': likes_slider,
+            'comments_slider': comments_slider,
+            'positive_filter': positive_filter,
+            'neutral_filter': neutral_filter,
+            'negative_filter': negative_filter,
+            'video_id_input': video_id_input,
+        }
+        save_controls(save_col,library_col,self.filters)
+        spec = presets.filter_spec(self.filters)
+        self.spec = spec
+        if spec.active_keywords and not spec.keyword_columns:
+            second_col.warning("Please select the filter for the keywords")
+        if video_id_input !='':
+            first_col.write(f"Showing data for Video ID: {video_id_input}")
+
+        # All filters are combined into one mask, the posts are copied once
+        filtered_df = filter_engine.apply(self.corpus, spec)
+
+        return filtered_df
+
+    def download_csv(self,column,filtered_df):
+        """
+        "Download as csv" of the posts and comments of the selection. The rows with all
+        their text columns are only read and serialized when the user asks for them,
+        the CSV is kept in the session until the filters change.
+        """
+        key = [self.corpus.name, self.corpus.store.mtime(self.corpus.csv_path), self.spec.key()]
+        prepared = st.session_state.get('csv_download')
+        if prepared is None or prepared[0] != key:
+            if not column.button("Prepare download"):
+                return
+            prepared = key, self.corpus.rows(filtered_df['video_id']).to_csv()
+            st.session_state['csv_download'] = prepared
+        column.download_button(
+                label="Download as csv",
+                data=prepared[1],
+                file_name=f"Social_media_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                mime="csv",
+            )
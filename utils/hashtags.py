@@ -0,0 +1,68 @@
+# import modules
+import os
+import re
+import ast
+import pandas as pd
+
+# The hashtags of the project, comma separated over several lines
+HASHTAGS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hashtags.txt')
+# Instagram posts without any hashtag of the project
+OTHER_HASHTAGS = 'other irrelevant hashtags'
+
+
+def read_hashtags(path=HASHTAGS_FILE):
+    """
+    The hashtags of hashtags.txt, without '#'.
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        return [tag.strip().lstrip('#') for tag in re.split(r'[,\n]', file.read()) if tag.strip()]
+
+
+# Lowercased hashtags of the project, built once
+PROJECT_HASHTAGS = frozenset(tag.lower() for tag in read_hashtags())
+
+
+def parse_hashtags(value):
+    """
+    The hashtags of a post as a list: Instagram posts store a stringified list,
+    the other platforms the hashtag the post was scraped for.
+    """
+    if not isinstance(value, str):
+        return []
+    if value.startswith('['):
+        try:
+            tags = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return []
+        return [str(tag) for tag in tags] if isinstance(tags, (list, tuple)) else []
+    return [value]
+
+
+def canonical_hashtag(value):
+    """
+    The hashtag a post was scraped for is its canonical hashtag. Of a list of hashtags
+    (Instagram) the first hashtag of the project is canonical, OTHER_HASHTAGS if there
+    is none. Lowercased and without '#'.
+    """
+    if not isinstance(value, str):
+        return None
+    if not value.startswith('['):
+        return value.strip().lstrip('#').lower()
+    tags = (tag.strip().lstrip('#').lower() for tag in parse_hashtags(value))
+    return next((tag for tag in tags if tag in PROJECT_HASHTAGS), OTHER_HASHTAGS)
+
+
+def hashtag_columns(hashtag):
+    """
+    The parsed hashtag lists and the canonical hashtag of a hashtag column. Each
+    distinct value is parsed once.
+        returns: {'hashtags': list column, 'canonical_hashtag': categorical column}
+    """
+    codes, uniques = pd.factorize(hashtag.astype(object))
+    parsed = [parse_hashtags(value) for value in uniques]
+    canonical = pd.Categorical([canonical_hashtag(value) for value in uniques])
+    hashtags = pd.Series([parsed[code] if code >= 0 else [] for code in codes], index=hashtag.index, dtype=object)
+    return {
+        'hashtags': hashtags,
+        'canonical_hashtag': pd.Series(canonical.take(codes, allow_fill=True), index=hashtag.index),
+    }
@@ -0,0 +1,102 @@
+# import modules
+import re
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+MATCH_MODES = ['any', 'all']
+
+# Not a character of \w of re, the \w of RE2 only knows ASCII
+NON_WORD_CHARACTER = r'[^\pL\pN_]'
+
+
+class KeywordMatcher():
+    """
+    Case insensitive keyword search over the lowercased text columns as pyarrow strings,
+    the keywords are a regular expression that runs in RE2 (pyarrow.compute, like
+    Series.str.contains on pyarrow strings). In 'any' mode the keywords are one alternation,
+    the columns are searched one after the other for the rows without a match. In 'all'
+    mode the keywords are searched one after the other for the rows that have all keywords
+    so far. A text is lowercased once and only when a row is not decided yet.
+        mode: 'any' (a post matches one of the keywords) or 'all' (a post matches every keyword,
+              in any of the columns)
+        whole_word: only match keywords that are not part of a longer word
+    """
+
+    def __init__(self, keywords, mode='any', whole_word=False) -> None:
+        if mode not in MATCH_MODES:
+            raise ValueError(f"Unsupported keyword mode {mode!r}, use one of {MATCH_MODES}.")
+        self.keywords = list(dict.fromkeys(keyword.strip().lower() for keyword in keywords if keyword.strip()))
+        self.mode = mode
+        self.whole_word = whole_word
+        keyword_groups = [self.keywords] if mode == 'any' else [[keyword] for keyword in self.keywords]
+        self.patterns = [self.pattern(keywords) for keywords in keyword_groups if keywords]
+
+    def pattern(self, keywords):
+        """
+        The regular expression matching any of the keywords.
+        """
+        alternation = '|'.join(re.escape(keyword) for keyword in keywords)
+        if not self.whole_word:
+            return alternation
+        # Word characters around an occurrence make it part of a longer word. No \b,
+        # keywords may start or end with # or @
+        return rf'(?:^|{NON_WORD_CHARACTER})(?:{alternation})(?:{NON_WORD_CHARACTER}|$)'
+
+    def search(self, texts, rows, pattern):
+        """
+        The rows whose lowercased text matches the pattern.
+            texts: pa.ChunkedArray of the lowercased texts of the rows
+        """
+        return rows[pc.match_substring_regex(texts, pattern).to_numpy()]
+
+    def mask(self, dataframe, columns):
+        """
+        Boolean array, True for the rows matching the keywords in any of the columns.
+        """
+        if not self.keywords:
+            return np.ones(len(dataframe), dtype=bool)
+        texts = LowercaseTexts(dataframe)
+
+        if self.mode == 'any':
+            matched = np.zeros(len(dataframe), dtype=bool)
+            for column in columns:
+                rows = np.flatnonzero(~matched)
+                matched[self.search(texts.get(column, rows), rows, self.patterns[0])] = True
+            return matched
+
+        # all: a row is dropped at the first keyword it does not contain
+        matched = np.ones(len(dataframe), dtype=bool)
+        for pattern in self.patterns:
+            found = np.zeros(len(dataframe), dtype=bool)
+            for column in columns:
+                rows = np.flatnonzero(matched & ~found)
+                found[self.search(texts.get(column, rows), rows, pattern)] = True
+            matched &= found
+        return matched
+
+
+class LowercaseTexts():
+    """
+    The lowercased texts of the columns of a frame as pyarrow strings, each text is
+    lowercased on first use. Missing values are empty texts.
+    """
+
+    def __init__(self, dataframe) -> None:
+        self.dataframe = dataframe
+        # column -> (chunks of lowercased texts, position of each row in the chunks, -1 where not lowercased yet)
+        self.columns = {}
+
+    def get(self, column, rows):
+        """
+        pa.ChunkedArray of the lowercased texts of the rows.
+        """
+        if column not in self.columns:
+            self.columns[column] = ([], np.full(len(self.dataframe), -1, dtype='int64'))
+        chunks, positions = self.columns[column]
+        new_rows = rows[positions[rows] < 0]
+        if len(new_rows):
+            values = self.dataframe[column].iloc[new_rows].astype('string').fillna('').to_numpy(dtype=object)
+            positions[new_rows] = sum(len(chunk) for chunk in chunks) + np.arange(len(new_rows))
+            chunks.append(pc.utf8_lower(pa.array(values, type=pa.string())))
+        return pa.chunked_array(chunks, type=pa.string()).take(positions[rows])
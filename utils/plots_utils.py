@@ -4,21 +4,19 @@ import datetime
 import locale
 from millify import millify
 import pandas as pd
-import numpy as np
-import json
-import ast
 
-from sklearn.feature_extraction.text import CountVectorizer
-import matplotlib.pyplot as plt
-from wordcloud import WordCloud
-from io import BytesIO
-
-import plotly.express as px
 import plotly.graph_objects as go
 
 import streamlit as st
 
-# # Custom imports
+# Custom imports
+from utils import presets
+from utils.presets import preset_library
+from utils.filter_panel import FilterPanel
+from utils.time_cube import time_cube_cache
+from utils.word_cloud_images import word_cloud_images
+from utils.figure_cache import figure_cache
+from utils import downsample
 # from utils.social_media_utils import SocialMedia
 # from utils.plots_utils import PlotsMetrics
 
@@ -28,40 +26,18 @@ class PlotsLayout():
     
     def __init__(self,dataframe_dict) -> None:
         
-        self.filters = {
-            'corpus_select': None,
-            'hashtags_select': [],
-            'channels_select': [],
-            'start_date': None,
-            'end_date': None,
-            'platform': [],
-            'shorts_filter': False,
-            'videos_filter': False,
-            'posts_filter': False,
-            'reels_filter': False,
-            'carousel_filter': False,
-            'keywords': [],
-            'caption_filter': False,
-            'title_filter': False,
-            'transcripts_filter': False,
-            'views_slider': (0, 0),
-            'subscribers_slider': (0, 0),
-            'likes_slider': (0, 0),
-            'comments_slider': (0, 0),
-            'positive_filter': False,
-            'neutral_filter': False,
-            'negative_filter': False,
-            'video_id_input': ''
-        }
-        
-        hashtags_file_path = 'utils/hashtags.txt'
-        with open(hashtags_file_path, 'r') as file:
-            raw_list= file.read().strip().split(',')
-            self.original_hashtags = ['#'+item.strip().replace('\n', ' ') for item in raw_list]
-
         self.dataframe_dict = dataframe_dict
-        
-        filtered_df = self.create_filters()
+
+        panel = FilterPanel(dataframe_dict)
+        filtered_df = panel.draw()
+        if filtered_df is None:
+            # No posts for the selection, the panel showed the warning
+            return
+        self.corpus,self.filters,self.spec = panel.corpus,panel.filters,panel.spec
+        first_col = panel.columns[0]
+        first_col.divider()
+        panel.download_csv(first_col,filtered_df)
+        self.figure_key = figure_cache.filter_key(self.corpus, self.spec)
 
         plots_col1,plots_col2 = st.columns(2)
         
@@ -72,7 +48,8 @@ class PlotsLayout():
             col_name = 'profile_name'
             header_name = 'Profile'
         else:
-            col_name = 'hashtag'
+            # Normalized at ingest, the Instagram posts are grouped by their first project hashtag (utils/hashtags.py)
+            col_name = 'canonical_hashtag'
             header_name = 'Hashtag'
 
 
@@ -88,7 +65,8 @@ class PlotsLayout():
                     st.subheader(f"Number of Posts/{header_name} ",divider='blue')
                     self.display_pie_chart(dataframe=filtered_df,column_name=col_name.lower())
         
-        # Number of posts over time
+        # Number of posts and subscribers over time, rolled up from the daily cube of the filter result
+        time_cube = time_cube_cache.get(self.corpus, self.spec, filtered_df)
         with plots_col1.container(height=plots_container_height):
             st.subheader("Number of posts over time",divider='blue')
             day_col,year_col = st.columns(2)
@@ -102,7 +80,7 @@ class PlotsLayout():
             else:
                 time_granularity = 'M'
 
-            self.num_posts_over_time(dataframe=filtered_df,col_name=col_name,date_filter=time_granularity)
+            self.num_posts_over_time(cube=time_cube,col_name=col_name,date_filter=time_granularity)
 
         with plots_col2.container(height=plots_container_height):
             st.subheader("Number of subscribers over time",divider='blue')
@@ -117,7 +95,7 @@ class PlotsLayout():
             else:
                 time_granularity = 'M'
             
-            self.num_subscribers_over_time(dataframe=filtered_df,col_name=col_name,date_filter=time_granularity)
+            self.num_subscribers_over_time(cube=time_cube,col_name=col_name,date_filter=time_granularity)
 
         # Views,likes,comments over time
         with plots_col1.container(height=plots_container_height):
@@ -127,15 +105,20 @@ class PlotsLayout():
             st.subheader("Relationship Between Views/Likes/Comments",divider='blue')
             self.views_likes_comments_relationship(dataframe=filtered_df,col_name=col_name)
 
+        # Both word clouds are drawn in parallel (or come from the image cache)
+        transcripts_image,comments_image = word_cloud_images.get_many(self.figure_key, [
+            ('posts', lambda: self.corpus.word_frequencies(filtered_df['video_id'], 'posts')),
+            ('comments', lambda: self.corpus.word_frequencies(filtered_df['video_id'], 'comments')),
+        ])
         with plots_col1:
             # Word cloud transcripts
             with st.container(height=plots_container_height):
                 col1,col2 = st.columns(2)
                 col1.subheader("Word Cloud Transcripts",divider='blue')
-                buffer = self.display_word_cloud(filtered_df,column_name='transcript_german')
+                image = self.display_word_cloud(transcripts_image)
                 col2.download_button(
                     label="Download Transcripts Image",
-                    data=buffer,
+                    data=image,
                     file_name="wordcloud.png",
                     mime="image/png"
                 )
@@ -144,10 +127,10 @@ class PlotsLayout():
             with st.container(height=plots_container_height):
                 col1,col2 = st.columns(2)
                 col1.subheader("Word Cloud Comments",divider='blue')
-                buffer = self.display_word_cloud(filtered_df,column_name='comment_text')
+                image = self.display_word_cloud(comments_image)
                 col2.download_button(
                     label="Download Comments Image",
-                    data=buffer,
+                    data=image,
                     file_name="wordcloud.png",
                     mime="image/png"
                 )
@@ -164,6 +147,11 @@ class PlotsLayout():
             st.warning("Please select at least one metric.")
             return
 
+        self.cached_chart('views_likes_comments_relationship', {'col_name': col_name, 'metrics': filter_options},
+                          lambda: self.views_likes_comments_relationship_figure(dataframe, col_name, filter_options))
+
+    @staticmethod
+    def views_likes_comments_relationship_figure(dataframe, col_name, filter_options):
         # Map the selected metrics to the corresponding column names
         metric_map = {
             "Views": 'views_count',
@@ -176,8 +164,7 @@ class PlotsLayout():
         dataframe = dataframe[[col_name, 'upload_date', 'video_id'] + filter_columns].dropna()
 
         if dataframe.empty:
-            st.warning("No data available to plot.")
-            return
+            return None
 
         dataframe = dataframe.sort_values(by='upload_date').reset_index(drop=True)
         dataframe['post_index'] = range(1, len(dataframe) + 1)
@@ -254,38 +241,45 @@ class PlotsLayout():
             width=1200,
             height=500
         )
-
-        st.plotly_chart(fig, use_container_width=True)
+        return fig
 
     def views_likes_comments_over_time(self, dataframe, col_name):
         filter_option = st.selectbox(
             "Select the metric to plot:",
             ["Views", "Likes", "Comments"]
         )
-        
+
+        display_name = 'Profile' if col_name == 'profile_name' else 'Hashtag'
+
+        st.subheader(f"Number of {filter_option} by {display_name}",divider='blue')
+        max_points = downsample.LARGE_CHART_POINTS
+        self.cached_chart('views_likes_comments_over_time',
+                          {'col_name': col_name, 'metric': filter_option, 'max_points': max_points},
+                          lambda: self.views_likes_comments_over_time_figure(dataframe, col_name, filter_option, max_points))
+
+    @staticmethod
+    def views_likes_comments_over_time_figure(dataframe, col_name, filter_option, max_points):
         # Map filter_option to the corresponding column
         filter_column_name = {
             'Views': 'views_count',
             'Likes': 'like_count',
             'Comments': 'comments_count'
         }[filter_option]
-
         display_name = 'Profile' if col_name == 'profile_name' else 'Hashtag'
 
-        st.subheader(f"Number of {filter_option} by {display_name}",divider='blue')
-        
         dataframe = dataframe[dataframe['title'].notna()]
         dataframe = dataframe[[col_name, filter_column_name, 'upload_date', 'video_id']].dropna()
         
         if dataframe.empty:
-            st.warning("No data available to plot.")
-            return
+            return None
         
         dataframe = dataframe.sort_values(by='upload_date').reset_index(drop=True)
         dataframe['post_index'] = dataframe.groupby(col_name).cumcount() + 1
-        
-        
-        
+
+        if len(dataframe) > max_points:
+            return PlotsLayout.views_likes_comments_over_time_large_figure(dataframe, col_name, filter_column_name,
+                                                                           filter_option, display_name, max_points)
+
         # Create a bar plot
         fig = go.Figure()
 
@@ -298,6 +292,8 @@ class PlotsLayout():
         for hashtag in hashtags:
             hashtag_df = dataframe[dataframe[col_name] == hashtag]
             hashtag_df = hashtag_df.set_index('post_index').reindex(combined_df['post_index']).reset_index()
+            # The reindex leaves pd.NA where a hashtag has fewer posts, plotly only serializes None
+            hashtag_df = hashtag_df.astype(object).where(hashtag_df.notna(), None)
             
             fig.add_trace(go.Bar(
                 x=hashtag_df['post_index'],
@@ -351,8 +347,70 @@ class PlotsLayout():
             height=500,
             barmode='group'  # This ensures bars for different hashtags are placed side by side
         )
+        return fig
+
+    @staticmethod
+    def views_likes_comments_over_time_large_figure(dataframe, col_name, filter_column_name,
+                                                    filter_option, display_name, max_points):
+        """
+        The chart of views_likes_comments_over_time_figure for more than max_points posts:
+        each series is downsampled with LTTB (utils/downsample.py) and drawn as a WebGL
+        trace, the title shows how many posts are drawn.
+        """
+        fig = go.Figure()
+
+        hashtags = dataframe[col_name].unique()
+        color_map = {hashtag: f'rgb({i*50}, {100+(i*30)%150}, {200-(i*50)%150})' for i, hashtag in enumerate(hashtags)}
+        series = [dataframe[dataframe[col_name] == hashtag] for hashtag in hashtags]
+        budgets = downsample.point_budgets([len(hashtag_df) for hashtag_df in series], max_points)
+
+        for hashtag, hashtag_df, budget in zip(hashtags, series, budgets):
+            if budget == 0:
+                # More series than points, the smallest ones are left out
+                continue
+            kept = downsample.lttb_indices(hashtag_df['post_index'], hashtag_df[filter_column_name], budget)
+            hashtag_df = hashtag_df.iloc[kept]
+            fig.add_trace(go.Scattergl(
+                x=hashtag_df['post_index'],
+                y=hashtag_df[filter_column_name],
+                mode='lines+markers',
+                name=hashtag,
+                line=dict(color=color_map[hashtag], width=1),
+                marker=dict(size=4),
+                hovertemplate='<b>Post Index:</b> <b>%{x}</b><br>' +
+                            '<b>Num:</b> <b>%{y}</b><br>' +
+                            '<b>Video ID:</b> <b>%{customdata}</b><br>' +
+                            '<extra></extra>',
+                customdata=hashtag_df['video_id']
+            ))
 
-        st.plotly_chart(fig, use_container_width=True)
+        shown = int(budgets.sum())
+        fig.update_layout(
+            title=f'Number of {filter_option} by {display_name} '
+                  f'({millify(shown)} of {millify(len(dataframe))} posts shown, 1:{len(dataframe) / shown:.1f})',
+            xaxis=dict(
+                title='Number of Posts',
+                titlefont=dict(size=18, color='black'),
+                tickfont=dict(size=12, color='black'),
+            ),
+            yaxis=dict(
+                title=f'Number of {filter_option}',
+                titlefont=dict(size=18, color='black'),
+                autorange=True,
+                tickfont=dict(size=14, color='black')
+            ),
+            legend=dict(
+                font=dict(size=18, color='black'),
+                orientation='v',
+                xanchor='left',
+                x=1.05,
+                yanchor='top',
+                y=1
+            ),
+            width=1200,
+            height=500,
+        )
+        return fig
 
 
     # def views_likes_comments_over_time(self,dataframe,col_name):
@@ -469,20 +527,18 @@ class PlotsLayout():
 
     #     st.plotly_chart(fig, use_container_width=True)
 
-    def num_subscribers_over_time(self,dataframe,col_name,date_filter):
+    def num_subscribers_over_time(self,cube,col_name,date_filter):
+        self.cached_chart('num_subscribers_over_time', {'col_name': col_name, 'date_filter': date_filter},
+                          lambda: self.num_subscribers_over_time_figure(cube,col_name,date_filter))
+
+    @staticmethod
+    def num_subscribers_over_time_figure(cube,col_name,date_filter):
         
-        dataframe = dataframe[dataframe['title'].notna()]
         if not col_name == 'profile_name':
             col_name = 'channel_name'
 
         # TODO: change youtube to self.platform
-        dataframe = dataframe[dataframe['platform']=='YouTube']
-        
-        subscribers_over_time = dataframe.groupby(
-            [dataframe['upload_date'].dt.to_period(date_filter), col_name]
-        )['subscribers_count'].sum().reset_index()
-
-        subscribers_over_time['upload_date'] = subscribers_over_time['upload_date'].astype(str)
+        subscribers_over_time = cube.rollup(date_filter, col_name, platform='YouTube')
 
         dates = sorted(subscribers_over_time['upload_date'].unique())
         hashtags = sorted(subscribers_over_time[col_name].unique())
@@ -562,19 +618,18 @@ class PlotsLayout():
             width=900,
             height=500
         )
-        st.plotly_chart(fig, use_container_width=True)
-
+        return fig
 
-    def num_posts_over_time(self,dataframe,col_name,date_filter):
 
-        dataframe = dataframe[dataframe['title'].notna()]
+    def num_posts_over_time(self,cube,col_name,date_filter):
+        self.cached_chart('num_posts_over_time', {'col_name': col_name, 'date_filter': date_filter},
+                          lambda: self.num_posts_over_time_figure(cube,col_name,date_filter))
 
-        posts_over_time = dataframe.groupby(
-            [col_name, dataframe['upload_date'].dt.to_period(date_filter)]
-        ).size().reset_index(name='post_count')
+    @staticmethod
+    def num_posts_over_time_figure(cube,col_name,date_filter):
 
+        posts_over_time = cube.rollup(date_filter, col_name)
         posts_over_time = posts_over_time[posts_over_time['post_count'] > 0]
-        posts_over_time['upload_date'] = posts_over_time['upload_date'].astype(str)
 
         dates = sorted(posts_over_time['upload_date'].unique())
         hashtags = sorted(posts_over_time[col_name].unique())
@@ -644,116 +699,75 @@ class PlotsLayout():
             width=900,
             height=500
         )
-        st.plotly_chart(fig, use_container_width=True)
-
-    # def filter_hashtags(self,hashtags):
-    #     if not isinstance(hashtags, list):
-    #         return ""
-    #     for tag in hashtags:
-    #         if tag in self.original_hashtags:
-    #             return tag.split('#')[1]
-    #     return str(hashtags)
-    
-    def filter_hashtags(self, hashtags):
-        if not isinstance(hashtags, list):
-            return "" 
-
-        hashtags = [tag.lower().strip() for tag in hashtags]
-        
-        for tag in hashtags:
-            if tag in [original_tag.lower().strip() for original_tag in self.original_hashtags]:
-                return tag.split('#')[1]
-
-        return "Other irrelevant hashtags"
-        
-    def safe_literal_eval(self,val):
-        if isinstance(val, str):
-            try:
-                return ast.literal_eval(val)
-            except (ValueError, SyntaxError):
-                return [] 
-        return []
+        return fig
 
+    def metrics_table(self,df,col_name):
+        """
+        Posts count, max views/likes/comments and the video_id of each max per
+        (hashtag/profile, platform), in one grouped aggregation. df is not changed.
+        """
+        # The hashtags are listed alphabetically, the profiles in the order of the korpus
+        group_key = df[col_name].astype(object) if col_name == 'canonical_hashtag' else df[col_name]
+        frame = pd.DataFrame({
+            'group': group_key,
+            'platform': df['platform'].astype(object),
+            'title': df['title'],
+            'views_count': df['views_count'],
+            'like_count': df['like_count'],
+            'comments_count': df['comments_count'],
+        })
+        table = frame.groupby(['group','platform'], observed=True).agg(
+            total_posts=('title','count'),
+            max_views=('views_count','max'),
+            max_views_post=('views_count','idxmax'),
+            max_likes=('like_count','max'),
+            max_likes_post=('like_count','idxmax'),
+            max_comments=('comments_count','max'),
+            max_comments_post=('comments_count','idxmax'),
+        )
+        # Row labels of the maxima to their video_id
+        for column in ['max_views_post','max_likes_post','max_comments_post']:
+            table[column] = df['video_id'].reindex(table[column]).to_numpy()
+        return table
 
     def display_metrics(self,df,col_name):
-        
-        instagram_data = df[df['platform'] == 'Instagram']
-        instagram_data['hashtag'] = instagram_data['hashtag'].apply(self.safe_literal_eval)
-        instagram_data['hashtag'] = instagram_data['hashtag'].apply(self.filter_hashtags)
-        df.update(instagram_data)
-        
-        df['hashtag'] = df['hashtag'].str.lower()
-        # df['hashtag'] = df['hashtag'].apply(lambda x: [item.lower() if isinstance(item, str) else item for item in x])
 
-        # Group by hashtag_name
-        grouped = df.groupby(col_name)
+        table = self.metrics_table(df,col_name)
+        platforms = ['YouTube', 'TikTok', 'Instagram']
+        display_name = 'PROFILE_NAME' if col_name == 'profile_name' else 'HASHTAG'
 
         # Iterate through each hashtag group
-        for hashtag, group in grouped:
-            st.subheader(f"Metrics for {col_name.upper()} : {hashtag}",divider='green')
+        for hashtag in table.index.get_level_values('group').unique():
+            st.subheader(f"Metrics for {display_name} : {hashtag}",divider='green')
             
-            platforms = ['YouTube', 'TikTok', 'Instagram']
-            col1, col2, col3 = st.columns(3)
+            columns = st.columns(3)
             for i, platform in enumerate(platforms):
-                platform_group = group[group['platform'] == platform]
-                platform_data = platform_group[platform_group['title'].notna()]
-                if not platform_group.empty:
-                    max_views = platform_group['views_count'].max()
-                    max_views_post = platform_group.loc[platform_group['views_count'].idxmax(), 'video_id']
-
-                    max_likes = platform_group['like_count'].max()
-                    max_likes_post = platform_group.loc[platform_group['like_count'].idxmax(), 'video_id']
-
-                    max_comments = platform_group['comments_count'].max()
-                    max_comments_post = platform_group.loc[platform_group['comments_count'].idxmax(), 'video_id']
-
-                    if i == 0:
-                        with col1:
-                            st.markdown(f"### {platform}")
-
-                            st.markdown(f"##### :violet-background[Total Posts:] ___{int(len(platform_data))}___")
-
-                            st.markdown(f"##### :red-background[Max Views:] ___{int(max_views)}___")
-                            st.markdown(f'##### :red-background[Post ID:] ___{max_views_post}___')
-
-                            st.markdown(f"##### :blue-background[Max Likes:] ___{int(max_likes)}___")
-                            st.markdown(f'##### :blue-background[Post ID:] ___{max_likes_post}___')
-                            
-                            st.markdown(f"##### :green-background[Max Comments:] ___{int(max_comments)}___")
-                            st.markdown(f'##### :green-background[Post ID:] ___{max_comments_post}___')
-                            
-                    elif i == 1:
-                        with col2:
-                            st.markdown(f"### {platform}")
-                            
-                            st.markdown(f"##### :violet-background[Total Posts:] ___{int(len(platform_data))}___")
-
-                            st.markdown(f"##### :red-background[Max Views:] ___{int(max_views)}___")
-                            st.markdown(f'##### :red-background[Post ID:] ___{max_views_post}___')
-
-                            st.markdown(f"##### :blue-background[Max Likes:] ___{int(max_likes)}___")
-                            st.markdown(f'##### :blue-background[Post ID:] ___{max_likes_post}___')
-                            
-                            st.markdown(f"##### :green-background[Max Comments:] ___{int(max_comments)}___")
-                            st.markdown(f'##### :green-background[Post ID:] ___{max_comments_post}___')
-                    elif i == 2:
-                        with col3:
-                            st.markdown(f"### {platform}")
-                            
-                            st.markdown(f"##### :violet-background[Total Posts:] ___{int(len(platform_data))}___")
-
-                            st.markdown(f"##### :red-background[Max Views:] ___{int(max_views)}___")
-                            st.markdown(f'##### :red-background[Post ID:] ___{max_views_post}___')
-
-                            st.markdown(f"##### :blue-background[Max Likes:] ___{int(max_likes)}___")
-                            st.markdown(f'##### :blue-background[Post ID:] ___{max_likes_post}___')
-                            
-                            st.markdown(f"##### :green-background[Max Comments:] ___{int(max_comments)}___")
-                            st.markdown(f'##### :green-background[Post ID:] ___{max_comments_post}___')
+                if (hashtag, platform) not in table.index:
+                    continue
+                metrics = table.loc[(hashtag, platform)]
+                with columns[i]:
+                    st.markdown(f"### {platform}")
+
+                    st.markdown(f"##### :violet-background[Total Posts:] ___{int(metrics['total_posts'])}___")
+
+                    st.markdown(f"##### :red-background[Max Views:] ___{int(metrics['max_views'])}___")
+                    st.markdown(f'##### :red-background[Post ID:] ___{metrics["max_views_post"]}___')
+
+                    st.markdown(f"##### :blue-background[Max Likes:] ___{int(metrics['max_likes'])}___")
+                    st.markdown(f'##### :blue-background[Post ID:] ___{metrics["max_likes_post"]}___')
+                    
+                    st.markdown(f"##### :green-background[Max Comments:] ___{int(metrics['max_comments'])}___")
+                    st.markdown(f'##### :green-background[Post ID:] ___{metrics["max_comments_post"]}___')
 
             st.markdown("---")  # Add a separator between different hashtags
 
     def display_pie_chart(self,dataframe,column_name):
+        self.cached_chart('pie_chart', {'column_name': column_name},
+                          lambda: self.pie_chart_figure(dataframe,column_name),
+                          use_container_width=False)
+
+    @staticmethod
+    def pie_chart_figure(dataframe,column_name):
         
         if column_name == 'profile_name':
             display_name = 'Profile'
@@ -763,6 +777,7 @@ class PlotsLayout():
         filtered_df = dataframe[dataframe['title'].notna()]
         hashtag_counts = filtered_df[column_name].value_counts().reset_index()
         hashtag_counts.columns = [column_name, 'post_count']
+        hashtag_counts = hashtag_counts[hashtag_counts['post_count'] > 0] # unused categories are counted as 0
 
         hashtag_counts['percentage'] = (hashtag_counts['post_count'] / hashtag_counts['post_count'].sum() * 100).round(1)
         
@@ -798,428 +813,35 @@ class PlotsLayout():
             width=1000,
             height=500 
         )
+        return fig
 
-    
-        st.plotly_chart(fig)
-
-    def display_word_cloud(self,dataframe,column_name):
-
-        text_df = dataframe[column_name].dropna()
-        # Combine all text into a single string
-        text = " ".join(review for review in text_df.tolist())
-        stop_words = np.loadtxt("utils/word_cloud_stopwords.txt",dtype=str)
-        filtered_text = " ".join([word for word in text.split() if word.lower() not in stop_words])
-        # Generate Word Cloud
-        wordcloud = WordCloud(width=450, height=250, background_color='white').generate(filtered_text)
-        plt.figure(figsize=(8, 4.5))
-        plt.imshow(wordcloud, interpolation='bilinear')
-        plt.axis("off")
-
-        # Save the plot to a BytesIO object
-        buffer = BytesIO()
-        plt.savefig(buffer, format='png')
-        buffer.seek(0)
-
-        st.pyplot(plt)
-
-        return buffer
-
-    def create_filters(self):
-        save_button, load_button = st.columns(2)
-        with save_button:
-            if st.download_button(
-                    label="Save Presets",
-                    data=self.save_presets(),
-                    file_name=f"preset_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-                    mime="application/json",
-                ):
-                st.success("saved presets sucessfully")
-        
-        with load_button:
-            uploaded_file = st.file_uploader("Upload a JSON file to load presets",
-                                             type="json",accept_multiple_files=False,
-                                             help="Upload the presets file",label_visibility="collapsed")
-            st.link_button("Load_presets",'uploaded_file')
-            if uploaded_file is not None:
-                st.success("loaded presets sucessfully")
-    
-        
-        
-        # Grid for the korpus filters 
-        first_col,second_col,third_col = st.columns(3)
-        
-        corpus_select = first_col.selectbox('Select a Korpus', 
-                                options=self.dataframe_dict.keys(),
-                                )
-        
-        self.filters['corpus_select'] = corpus_select
-        # self.apply_loaded_presets() # TODO : NEED TO change the approach
-
-        # Set the data types for the pandas dataframe
-        dataframe = pd.read_csv(self.dataframe_dict[self.filters['corpus_select']],low_memory=False)
-        self.set_dataframe_format(dataframe,corpus_select)
-
-        # Filters for hashtag and profile names
-        if not corpus_select == 'influencer_korpus':
-            hashtags_list = dataframe['hashtag'].unique()
-            hashtag_text = "Select the hashtags"
-        else:
-            hashtags_list = dataframe['profile_name'].unique()
-            hashtag_text = "Select the profile"
-
-        hashtags_select = first_col.multiselect(hashtag_text,
-                                          options=hashtags_list,
-                                          default=None
-                                          )
-        self.filters['hashtags_select'] = hashtags_select  
-        
-        # Fist stage of data filtering for hashtags and channel names
-        if hashtags_select:
-            if corpus_select != 'influencer_korpus':
-                filtered_df = dataframe[dataframe['hashtag'].isin(hashtags_select)]
-            else:
-                filtered_df = dataframe[dataframe['profile_name'].isin(hashtags_select)]
-        else:
-            filtered_df = dataframe # If no hashtags selected, use the entire dataframe
-
-        platform = first_col.multiselect('Select a platform', 
-                                options=["Instagram","TikTok","YouTube"],
-                                default= None
-                                )
-        
-        # Filter based on selected platforms
-        if platform:
-            filtered_df = filtered_df[filtered_df['platform'].isin(platform)]
-
-        with first_col:
-            if 'YouTube' in platform:
-                st.caption("Youtube Filters")
-                shorts_col,videos_col = st.columns(2,vertical_alignment='top')
-                shorts_filter,videos_filter = shorts_col.checkbox('Shorts'),videos_col.checkbox('Videos')
-                if shorts_filter and videos_filter:
-                    filtered_df = filtered_df[
-                        filtered_df['media_type'].isin(['shorts', 'video'])
-                    ]
-                elif shorts_filter:
-                    filtered_df = filtered_df[filtered_df['media_type'] == 'shorts']
-                elif videos_filter:
-                    filtered_df = filtered_df[filtered_df['media_type'] == 'video']
-            if 'Instagram' in platform:
-                st.caption("Instagram Filters")
-                posts_col,reels_col = st.columns(2,vertical_alignment='top')
-                posts_filter,reels_filter = posts_col.checkbox('Posts',disabled=False),reels_col.checkbox('Reels',disabled=False)
-                selected_filters = []
-                if posts_filter:
-                    selected_filters.append('Posts')
-                if reels_filter:
-                    selected_filters.append('Reels')
-
-                if selected_filters:
-                    filtered_df['is_video'] = filtered_df['is_video'].astype(bool)
-                    filtered_df['media_type'] = filtered_df['is_video'].apply(lambda x: 'Reels' if x else 'Posts')
-                    # Now filter the dataframe based on the selected filters (Post or Reel)
-                    filtered_df = filtered_df[filtered_df['media_type'].isin(selected_filters)]
-            if filtered_df.empty:
-                    st.warning("No posts available for the selected filters.")
-                    return pd.DataFrame(),corpus_select
-
-
-        # Second stage filters
-        with second_col:
-            start_date_filter, end_date_filter = st.columns(2)
-            start_date = start_date_filter.date_input(
-                "Start date",
-                min_value=min(filtered_df['upload_date'].dt.date),
-                max_value=max(filtered_df['upload_date'].dt.date),
-                value=min(filtered_df['upload_date'].dt.date),
-            )
-            end_date = end_date_filter.date_input(
-                "End date",
-                min_value=min(filtered_df['upload_date'].dt.date),
-                max_value=max(filtered_df['upload_date'].dt.date),
-                value=max(filtered_df['upload_date'].dt.date),
-            )
-        filtered_df = self.filter_by_date(
-            filtered_df, start_date, end_date)
-
-        # Get channel names based on the filtered dataframe
-        channels_list = filtered_df['channel_name'].unique().tolist()
-
-        channels_select = second_col.multiselect("Select channel names",
-                                               options=channels_list,
-                                               default=None,
-                                               )
-        if channels_select:
-                filtered_df = filtered_df[filtered_df['channel_name'].isin(channels_select)]
-        
-        # filter data based on the keywords:
-        keywords = second_col.text_input('Enter the keywords').split(',')
-        with second_col: # keyword filters
-            caption_col,title_col,transcripts_col = st.columns(3)
-            caption_filter = caption_col.checkbox('Caption')
-            title_filter = title_col.checkbox("Title")
-            if 'YouTube' in platform:
-                transcripts_filter = transcripts_col.checkbox("Transcripts")
-            else:
-                transcripts_filter= transcripts_col.checkbox("Transcripts",disabled=True)
-
-            if keywords !=['']:
-                mask = self.get_filter_keywords(filtered_df,caption_filter,title_filter,transcripts_filter,keywords=keywords)
-                if mask is not None:
-                    filtered_df= filtered_df[mask]
-                else:
-                    st.warning("Please select the filter for the keywords")
-
-            # third stage filter        
-        filtered_df['comments_count'] = pd.to_numeric(filtered_df['comments_count'], errors='coerce').fillna(0).astype(int)
-
-        with third_col:
-            # Initialize the sliders based on platform type
-            if 'YouTube' in platform or 'TikTok' in platform  or platform == []:
-                views_slider = st.slider(
-                    "Views",
-                    min_value=int(filtered_df['views_count'].min()), 
-                    max_value=int(filtered_df['views_count'].max()), 
-                    value=(int(filtered_df['views_count'].min()), int(filtered_df['views_count'].max()))
-                )
-                filtered_df = filtered_df[
-                    (filtered_df['views_count'] >= views_slider[0]) & (filtered_df['views_count'] <= views_slider[1])
-                ]
-            else:
-                views_slider = None  # Set to None for Instagram since there are no view counts
-
-            if 'YouTube' in platform or platform == []:
-                subscribers_slider = st.slider(
-                    "Subscribers",
-                    min_value=int(filtered_df['subscribers_count'].min()), 
-                    max_value=int(filtered_df['subscribers_count'].max()), 
-                    value=(int(filtered_df['subscribers_count'].min()), int(filtered_df['subscribers_count'].max()))
-                )
-                filtered_df = filtered_df[
-                    (filtered_df['subscribers_count'] >= subscribers_slider[0]) & (filtered_df['subscribers_count'] <= subscribers_slider[1])
-                ]
-            else:
-                subscribers_slider = None  # Set to None for platforms that don't have subscribers count
-
-            likes_slider = st.slider(
-                "Likes",
-                min_value=int(filtered_df['like_count'].min()), 
-                max_value=int(filtered_df['like_count'].max()), 
-                value=(int(filtered_df['like_count'].min()), int(filtered_df['like_count'].max()))
-            )
-
-            comments_slider = st.slider(
-                "Comments",
-                min_value=int(filtered_df['comments_count'].min()), 
-                max_value=int(filtered_df['comments_count'].max()), 
-                value=(int(filtered_df['comments_count'].min()), int(filtered_df['comments_count'].max()))
-            )
-
-        # Apply the filtering after collecting all slider values
-        filtered_df = filtered_df[
-            (filtered_df['like_count'] >= likes_slider[0]) & (filtered_df['like_count'] <= likes_slider[1]) &
-            (filtered_df['comments_count'] >= comments_slider[0]) & (filtered_df['comments_count'] <= comments_slider[1])
-        ]
-
-        # If the platform is Instagram and doesn't have 'views_count' or 'subscribers_count', don't filter on those columns
-        if views_slider is not None:
-            filtered_df = filtered_df[
-                (filtered_df['views_count'] >= views_slider[0]) & (filtered_df['views_count'] <= views_slider[1])
-            ]
-        if subscribers_slider is not None:
-            filtered_df = filtered_df[
-                (filtered_df['subscribers_count'] >= subscribers_slider[0]) & (filtered_df['subscribers_count'] <= subscribers_slider[1])
-            ]
-    # with third_col:
-        #     views_slider = st.slider("Views",
-        #                         min_value=int(filtered_df['views_count'].min()), 
-        #                         max_value=int(filtered_df['views_count'].max()), 
-        #                         value=(int(filtered_df['views_count'].min()), int(filtered_df['views_count'].max())))
-
-        #     if 'YouTube' in platform:
-        #         subscribers_slider = st.slider("Subscribers",
-        #                                 min_value=int(filtered_df['subscribers_count'].min()), 
-        #                                 max_value=int(filtered_df['subscribers_count'].max()), 
-        #                                 value=(int(filtered_df['subscribers_count'].min()), int(filtered_df['subscribers_count'].max())))
-        #         filtered_df = filtered_df[(filtered_df['subscribers_count'] >= subscribers_slider[0]) & (filtered_df['subscribers_count'] <= subscribers_slider[1])]
-            
-        #     likes_slider = st.slider("Likes",
-        #                             min_value=int(filtered_df['like_count'].min()), 
-        #                             max_value=int(filtered_df['like_count'].max()), 
-        #                             value=(int(filtered_df['like_count'].min()), int(filtered_df['like_count'].max())))
-                        
-        #     if filtered_df['comments_count'].min() !=filtered_df['comments_count'].max():
-        #         comments_slider = st.slider("Comments",
-        #                                 min_value=int(filtered_df['comments_count'].min()), 
-        #                                 max_value=int(filtered_df['comments_count'].max()), 
-        #                                 value=(int(filtered_df['comments_count'].min()), int(filtered_df['comments_count'].max())))
-        #         filtered_df = filtered_df[(filtered_df['comments_count'] >= comments_slider[0]) & (filtered_df['comments_count'] <= comments_slider[1])]
-            
-        # filtered_df = filtered_df[
-        #                 (filtered_df['views_count'] >= views_slider[0]) & (filtered_df['views_count'] <= views_slider[1]) &
-        #                 (filtered_df['like_count'] >= likes_slider[0]) & (filtered_df['like_count'] <= likes_slider[1])]
-
-        with third_col:
-            third_col.write("Select Sentiment")
-            positive_senti_col,neutral_senti_col,negative_senti_col = st.columns(3)
-            positive_filter = positive_senti_col.checkbox('Positive Sentiment')
-            neutral_filter = neutral_senti_col.checkbox('Neutral Sentiment')
-            negative_filter = negative_senti_col.checkbox('Negative Sentiment')
-        
-        # Display DataFrame based on Video ID
-        with first_col:
-            # Input for video_id
-            video_id_input = st.text_input("Enter Video ID")
-            if video_id_input !='':
-                filtered_df = filtered_df[filtered_df['video_id'] == video_id_input]
-                st.write(f"Showing data for Video ID: {video_id_input}")
-        
-        filtered_df.loc[filtered_df['platform'] == 'TikTok', 'replied_to_comment_id'] = 'root'
-        filtered_df = filtered_df.reset_index(drop=True)
-        first_col.divider()
-        first_col.download_button(
-                    label="Download as csv",
-                    data=filtered_df.to_csv(),
-                    file_name=f"Social_media_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                    mime="csv",
-                )
-
-        return filtered_df
+    def cached_chart(self,chart,params,build,use_container_width=True):
+        """
+        Shows a chart from the figure cache (utils/figure_cache.py), build() makes the
+        figure if the filters or the chart parameters changed.
+        """
+        fig = figure_cache.get(chart, self.figure_key, params, build)
+        if fig is None:
+            st.warning("No data available to plot.")
+            return
+        st.plotly_chart(fig, use_container_width=use_container_width)
 
+    def display_word_cloud(self,image):
+        """
+        Shows a word cloud image (PNG bytes from utils/word_cloud_images.py).
+            returns: the image for the download button
+        """
+        if image is None:
+            st.warning("No words for the word cloud of the selected posts.")
+            return b''
+        st.image(image, use_column_width=True)
+        return image
 
     def display_dataframe(self,dataframe):
         columns_to_display = ['video_id','platform','channel_name','title','video_description','video_duration','views_count','comments_count','like_count','subscribers_count','upload_date','extracted_date','transcript_german','video_category']
         return dataframe[columns_to_display]
 
 
-    def set_dataframe_format(self,dataframe,corpus_select):
-
-        dataframe['views_count'] = dataframe['views_count'].fillna(0)
-        dataframe['subscribers_count'] = dataframe['subscribers_count'].fillna(0)
-        dataframe['like_count'] = dataframe['like_count'].fillna(0)
-        dataframe['comments_count'] = dataframe['comments_count'].fillna(0)
-        dataframe['comment_likes'] = dataframe['comment_likes'].fillna(0)
-
-        if corpus_select == 'influencer_korpus':
-            col_key = 'profile_name'
-        else:
-            col_key = 'hashtag'
-
-        mapping_types_conversion = {
-                                "video_id":"string",
-                                "title":"string",
-                                "video_description":"string",
-                                "thumbnail_url":"string",
-                                "channel_id":"category",
-                                "channel_url":"string",
-                                "video_duration":"string",
-                                "views_count":"Int64",
-                                "original_url":"string",
-                                "comments_count":"Int64",
-                                "like_count":"Int64",
-                                "time_stamp":"string",
-                                "transcript_german":"string",
-                                # "extracted_date":"datetime64[ns]",
-                                f"{col_key}":"category", # spanch for influencer corpus there is no hashtag only profilename
-                                "platform":"category",
-                                "media_type":"category",
-                                "comment_text":"string",
-                                "comment_likes":"Int64",
-                                "author_name":"string",
-                                "author_id":"category",
-                                "comment_id":"category",
-                                "replied_to_comment_id":"category",
-                                "comment_date":"datetime64[ns]",
-                                # "upload_date":"datetime64[ns]",
-                            }
-        try:
-            dataframe.astype(mapping_types_conversion)
-            # Replace 'No subscribers count' with 0 for TikTok
-            dataframe.loc[(dataframe['platform'] == 'TikTok') & (dataframe['subscribers_count'] == 'No subscribers count'), 'subscribers_count'] = 0
-            dataframe['subscribers_count'] = self.safe_convert_to_int(dataframe['subscribers_count'])
-            dataframe["upload_date"] = pd.to_datetime(dataframe["upload_date"], errors='coerce')
-            dataframe["comment_date"] = pd.to_datetime(dataframe["comment_date"], errors='coerce')
-            dataframe["extracted_date"] = pd.to_datetime(dataframe["extracted_date"], errors='coerce')
-        except Exception as e:
-            st.error(e)
-
-    def safe_convert_to_int(self,column):
-        column_numeric = pd.to_numeric(column, errors='coerce')
-        column_int = column_numeric.dropna().astype(int)
-        column_int = column_numeric.astype('Int64')
-        return column_int
-        
-    
-    def apply_loaded_presets(self):
-        # Apply the loaded presets to the UI elements
-        if self.filters['corpus_select']:
-            st.selectbox('Select a Korpus',
-                         options= self.dataframe_dict.keys(), index=list(self.dataframe_dict.keys()).index(self.filters['corpus_select']))
-
-        # For example, if 'hashtags_select' was loaded, you can set it in the multiselect:
-        if self.filters['hashtags_select']:
-            st.multiselect('Select hashtags', 
-                           options= self.dataframe_dict[self.filters['corpus_select']]['hashtag'].unique(), 
-                           default=self.filters['hashtags_select'])
-
-    
-    
-    def save_presets(self):
-        # Convert the filters to JSON format
-        return json.dumps(self.filters, indent=4)
-        
-    def load_presets(self):
-        # Load a JSON file with presets
-        uploaded_file = st.file_uploader("Choose a preset file", type="json")
-        if uploaded_file is not None:
-            self.filters = json.load(uploaded_file)
-            st.success("Presets loaded successfully")
-    
-    
-    def filter_by_date(self, df, start_date, end_date):
-        try:
-            # # Filter based on the date range
-            # mask = (df['upload_date'].dt.date >= start_date) & (df['upload_date'].dt.date <= end_date)
-            # return df[mask]
-
-            # Step 1: Identify the video_ids within the selected date range
-            start_date = pd.to_datetime(start_date)
-            end_date = pd.to_datetime(end_date)
-            video_ids_in_range = df[
-                (df['upload_date'] >= start_date) & 
-                (df['upload_date'] <= end_date)
-            ]['video_id'].unique()
-
-            # Step 2: Filter the DataFrame to include all rows for these video_ids
-            filtered_data = df[df['video_id'].isin(video_ids_in_range)]
-
-            return filtered_data
-
-        except Exception as e:
-            st.error(f"An error occurred while filtering by date: {e}")
-            return pd.DataFrame()  # Return an empty DataFrame in case of error
-    
-    
-    def first_stage_filter_df(self, df, hashtags_select, channels_select, corpus_select):
-        try:
-            # Apply hashtag/profile filter if selections are made
-            if hashtags_select:
-                if corpus_select != 'influencer_korpus':
-                    df = df[df['hashtag'].isin(hashtags_select)]
-                else:
-                    df = df[df['profile_name'].isin(hashtags_select)]
-
-            # Apply channel filter if selections are made
-            if channels_select:
-                df = df[df['channel_name'].isin(channels_select)]
-
-            return df
-
-        except Exception as e:
-            st.error(f"An error occurred while filtering the data: {e}")
-            return pd.DataFrame()
-
-
     def color_platform_cell(self,platform):
 
         colors = {"YouTube" : "Red",
@@ -1228,34 +850,32 @@ class PlotsLayout():
                   }
         return f"background-color: {colors[platform]}"
 
-    def get_filter_keywords(self,dataframe,caption_filter,title_filter,transcripts_filter,keywords):
-        """
-        Returns the mask based on the applied filters.
-            mask: list(True|False)
-        """
-        if caption_filter and title_filter and transcripts_filter:
-            mask = dataframe.apply(lambda x: any(self.check_keywords(text =x[col],keywords=keywords) for col in ['title','video_description','transcript_german']), axis=1)
-        elif not caption_filter and not title_filter and not transcripts_filter:
-            mask = None
-        elif caption_filter and title_filter and not transcripts_filter:
-            mask = dataframe.apply(lambda x: any(self.check_keywords(x[col],keywords=keywords) for col in ['title','video_description']), axis=1)
-        elif caption_filter and not title_filter and transcripts_filter:
-            mask = dataframe.apply(lambda x: any(self.check_keywords(x[col],keywords=keywords) for col in ['video_description','transcript_german']), axis=1)
-        elif not caption_filter and title_filter and transcripts_filter:
-            mask = dataframe.apply(lambda x: any(self.check_keywords(x[col],keywords=keywords) for col in ['title','transcript_german']), axis=1)
-        elif caption_filter and not title_filter and not transcripts_filter:
-            mask = dataframe.apply(lambda x: any(self.check_keywords(x[col],keywords=keywords) for col in ['video_description']), axis=1)
-        elif not caption_filter and title_filter and not transcripts_filter:
-            mask = dataframe.apply(lambda x: any(self.check_keywords(x[col],keywords=keywords) for col in ['title']), axis=1)
-            print("Title mask : ", mask)
-        elif not caption_filter and not title_filter and transcripts_filter:
-            mask = dataframe.apply(lambda x: any(self.check_keywords(x[col],keywords=keywords) for col in ['transcript_german']), axis=1)
-        
-        return mask
-    
-    def check_keywords(self,text,keywords):
-        """
-        Returns True if the keyword is present in the text
-        """
-        return any(keyword.lower() in str(text).lower() for keyword in keywords)
-    
+
+def warm_figures(corpus, filters, filtered_df):
+    """
+    Warmer of the saved presets (PresetLibrary.register_warmer): builds the charts of
+    the Plots page with the chart options it opens with.
+    """
+    spec = presets.filter_spec(filters)
+    filter_key = figure_cache.filter_key(corpus, spec)
+    col_name = 'profile_name' if filters['corpus_select'] == 'influencer_korpus' else 'canonical_hashtag'
+    cube = time_cube_cache.get(corpus, spec, filtered_df)
+    max_points = downsample.LARGE_CHART_POINTS
+    charts = [
+        ('pie_chart', {'column_name': col_name},
+         lambda: PlotsLayout.pie_chart_figure(filtered_df, col_name)),
+        ('num_posts_over_time', {'col_name': col_name, 'date_filter': 'M'},
+         lambda: PlotsLayout.num_posts_over_time_figure(cube, col_name, 'M')),
+        ('num_subscribers_over_time', {'col_name': col_name, 'date_filter': 'M'},
+         lambda: PlotsLayout.num_subscribers_over_time_figure(cube, col_name, 'M')),
+        ('views_likes_comments_over_time', {'col_name': col_name, 'metric': 'Views', 'max_points': max_points},
+         lambda: PlotsLayout.views_likes_comments_over_time_figure(filtered_df, col_name, 'Views', max_points)),
+        ('views_likes_comments_relationship', {'col_name': col_name, 'metrics': ['Views']},
+         lambda: PlotsLayout.views_likes_comments_relationship_figure(filtered_df, col_name, ['Views'])),
+    ]
+    for chart, params, build in charts:
+        figure_cache.get(chart, filter_key, params, build)
+
+
+# The charts of saved presets are built in the background
+preset_library.register_warmer(warm_figures)
@@ -0,0 +1,51 @@
+# import modules
+import numpy as np
+import pandas as pd
+
+
+class PostStats():
+    """
+    The counts of the posts as int64 arrays, one entry per post in the order of
+    Corpus.posts (missing counts are 0), and a video_id index into them.
+    Built once when a korpus is loaded, the slider filters and bounds read it.
+    """
+
+    def __init__(self, video_ids, columns) -> None:
+        self.index = pd.Index(video_ids)
+        self.columns = columns
+
+    @classmethod
+    def build(cls, posts, columns):
+        video_ids = posts['video_id'].astype(str).to_numpy(dtype=object)
+        values = {}
+        for column in columns:
+            if column in posts.columns:
+                values[column] = posts[column].to_numpy(dtype='float64', na_value=0).astype('int64')
+            else:
+                values[column] = np.zeros(len(posts), dtype='int64')
+        return cls(video_ids, values)
+
+    def between(self, column, low, high, positions=None):
+        """
+        Boolean array, True for the posts (at the positions, all posts if None) with low <= value <= high.
+        """
+        values = self.columns[column] if positions is None else self.columns[column][positions]
+        return (values >= low) & (values <= high)
+
+    def bounds(self, column, positions=None):
+        """
+        (min, max) of the column over the posts at the positions, (0, 0) if there are none.
+        """
+        values = self.columns[column] if positions is None else self.columns[column][positions]
+        if len(values) == 0:
+            return 0, 0
+        return int(values.min()), int(values.max())
+
+    def positions(self, video_ids):
+        """
+        Positions of the posts of the given video_ids, in the order of the posts.
+        """
+        return np.flatnonzero(self.index.isin({str(video_id) for video_id in video_ids}))
+
+    def memory_usage(self):
+        return int(sum(values.nbytes for values in self.columns.values()) + self.index.memory_usage(deep=True))
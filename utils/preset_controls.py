@@ -0,0 +1,54 @@
+# import modules
+import datetime
+import streamlit as st
+
+# Custom imports
+from utils import presets
+from utils.presets import preset_library
+
+
+def preset_controls():
+    """
+    Upload of a preset file and the presets saved on the server, above the filters of
+    both layouts. A loaded preset is kept in the session and gives the values of the
+    filter widgets.
+        returns: the columns for the download and save buttons (save_controls)
+    """
+    # Results of the saved presets are computed in the background once per server process
+    preset_library.prewarm_once()
+    save_col,load_col,library_col = st.columns(3)
+
+    uploaded_file = load_col.file_uploader("Upload a JSON file to load presets",
+                                           type="json",accept_multiple_files=False,
+                                           help="Upload the presets file",label_visibility="collapsed")
+    # The uploaded file stays in the widget, it is only applied once
+    if uploaded_file is not None and st.session_state.get('preset_file_id') != uploaded_file.file_id:
+        st.session_state['preset_file_id'] = uploaded_file.file_id
+        try:
+            st.session_state['filter_preset'] = presets.loads(uploaded_file.getvalue().decode('utf-8'))
+            load_col.success("loaded presets sucessfully")
+        except (ValueError, TypeError) as e:
+            load_col.error(f"Could not load the presets file: {e}")
+
+    preset_name = library_col.selectbox("Saved presets", options=preset_library.names(), index=None,
+                                        placeholder="Saved presets", label_visibility="collapsed")
+    if library_col.button("Load preset", disabled=preset_name is None):
+        st.session_state['filter_preset'] = preset_library.load(preset_name)
+    return save_col,library_col
+
+
+def save_controls(save_col,library_col,filters):
+    """
+    Download of the filter state as a preset file and saving it on the server.
+    """
+    save_col.download_button(
+            label="Save Presets",
+            data=presets.dumps(filters),
+            file_name=f"preset_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+            mime="application/json",
+        )
+    name_col,button_col = library_col.columns(2)
+    preset_name = name_col.text_input("Preset name",placeholder="Preset name",label_visibility="collapsed")
+    if button_col.button("Save on server", disabled=not preset_name.strip()):
+        preset_library.save(preset_name, filters)
+        library_col.success(f"saved preset {preset_name.strip()}")
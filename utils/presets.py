@@ -0,0 +1,226 @@
+# import modules
+import os
+import json
+import datetime
+import threading
+import importlib
+from urllib.parse import quote, unquote
+
+# Custom imports
+from utils.corpus_store import DATABASE_DIR
+from utils.corpus_cache import corpus_cache
+from utils.corpus_manifest import corpus_manifest
+from utils.filter_engine import FilterSpec, filter_engine
+
+# Saved presets of the server (one JSON file per preset)
+PRESET_DIR = os.path.join(DATABASE_DIR, 'presets')
+# Modules that register a warmer (chart data of the Plots page) for the saved presets
+WARMER_MODULES = ['utils.time_cube', 'utils.plots_utils']
+
+# The filter panel state, the widgets of both layouts fill it in and a preset stores it
+DEFAULT_FILTERS = {
+    'corpus_select': None,
+    'hashtags_select': [],
+    'channels_select': [],
+    'start_date': None,
+    'end_date': None,
+    'platform': [],
+    'shorts_filter': False,
+    'videos_filter': False,
+    'posts_filter': False,
+    'reels_filter': False,
+    'carousel_filter': False,
+    'keywords': [],
+    'caption_filter': False,
+    'title_filter': False,
+    'transcripts_filter': False,
+    'keyword_mode': 'any',
+    'whole_word': False,
+    'views_slider': None,
+    'subscribers_slider': None,
+    'likes_slider': None,
+    'comments_slider': None,
+    'positive_filter': False,
+    'neutral_filter': False,
+    'negative_filter': False,
+    'video_id_input': '',
+}
+DATE_FIELDS = ['start_date', 'end_date']
+SLIDER_FIELDS = ['views_slider', 'subscribers_slider', 'likes_slider', 'comments_slider']
+
+
+def dumps(filters):
+    """
+    The filter state as JSON, dates as YYYY-MM-DD.
+    """
+    return json.dumps({key: filters.get(key, default) for key, default in DEFAULT_FILTERS.items()},
+                      indent=4, default=str, ensure_ascii=False)
+
+
+def loads(text):
+    """
+    Reads a preset saved with dumps. Missing fields get their defaults, unknown fields are ignored.
+    """
+    preset = json.loads(text)
+    if not isinstance(preset, dict):
+        raise ValueError("A preset is a JSON object of filter values.")
+    filters = dict(DEFAULT_FILTERS)
+    filters.update({key: value for key, value in preset.items() if key in DEFAULT_FILTERS})
+    for key in DATE_FIELDS:
+        if filters[key] is not None:
+            filters[key] = datetime.date.fromisoformat(str(filters[key])[:10])
+    for key in SLIDER_FIELDS:
+        if filters[key] is not None:
+            filters[key] = tuple(int(value) for value in filters[key])
+    return filters
+
+
+def filter_spec(filters):
+    """
+    The FilterSpec of a filter state, used by the layouts and to pre-warm saved presets.
+    """
+    checked = lambda pairs: [value for value, field in pairs if filters.get(field)]
+    corpus_select = filters['corpus_select']
+    return FilterSpec(
+        corpus=corpus_select,
+        group_column='profile_name' if corpus_select == 'influencer_korpus' else 'canonical_hashtag',
+        groups=list(filters['hashtags_select']),
+        platforms=list(filters['platform']),
+        media_types=checked((('shorts', 'shorts_filter'), ('video', 'videos_filter'))),
+        instagram_types=checked((('Posts', 'posts_filter'), ('Reels', 'reels_filter'))),
+        start_date=filters['start_date'],
+        end_date=filters['end_date'],
+        channels=list(filters['channels_select']),
+        keywords=list(filters['keywords']),
+        keyword_columns=checked((('title', 'title_filter'), ('video_description', 'caption_filter'),
+                                 ('transcript_german', 'transcripts_filter'))),
+        keyword_mode=filters.get('keyword_mode', 'any'),
+        whole_word=filters.get('whole_word', False),
+        views=filters['views_slider'],
+        subscribers=filters['subscribers_slider'],
+        likes=filters['likes_slider'],
+        comments=filters['comments_slider'],
+        sentiments=checked((('positive', 'positive_filter'), ('neutral', 'neutral_filter'),
+                            ('negative', 'negative_filter'))),
+        video_id=filters['video_id_input'],
+    )
+
+
+def clamp_range(value, low, high):
+    """
+    A preset slider value within the bounds of the slider, the full range if there is none.
+    """
+    if value is None:
+        return low, high
+    start, end = max(low, min(value[0], high)), min(high, max(value[1], low))
+    return (start, end) if start <= end else (low, high)
+
+
+def clamp_date(value, low, high):
+    """
+    A preset date within the dates of the selection, None (no date filter) if they have no upload dates.
+    """
+    if low is None or high is None:
+        return None
+    return low if value is None else max(low, min(value, high))
+
+
+def keep_options(values, options):
+    """
+    The preset values that are options of the widget, in the order of the preset.
+    """
+    options = set(options)
+    return [value for value in values if value in options]
+
+
+class PresetLibrary():
+    """
+    The presets saved on the server, shared by all sessions. The filter results of
+    saved presets are computed in the background, so they open from the caches.
+    """
+
+    def __init__(self, preset_dir=PRESET_DIR) -> None:
+        self.preset_dir = preset_dir
+        self.lock = threading.Lock()
+        self.prewarmed = False
+        # Functions (corpus, filters, filtered posts) that pre-compute chart data of a preset
+        self.warmers = []
+
+    def path(self, name):
+        return os.path.join(self.preset_dir, quote(name, safe='') + '.json')
+
+    def names(self):
+        if not os.path.isdir(self.preset_dir):
+            return []
+        return sorted(unquote(file_name[:-len('.json')]) for file_name in os.listdir(self.preset_dir)
+                      if file_name.endswith('.json'))
+
+    def load(self, name):
+        with open(self.path(name), 'r', encoding='utf-8') as file:
+            return loads(file.read())
+
+    def save(self, name, filters):
+        """
+        Saves (or replaces) a preset and pre-warms its results.
+        """
+        name = name.strip()
+        if not name:
+            raise ValueError("A preset needs a name.")
+        with self.lock:
+            os.makedirs(self.preset_dir, exist_ok=True)
+            path = self.path(name)
+            with open(path + '.tmp', 'w', encoding='utf-8') as file:
+                file.write(dumps(filters))
+            os.replace(path + '.tmp', path)
+        self.prewarm([filters])
+
+    def delete(self, name):
+        with self.lock:
+            if os.path.exists(self.path(name)):
+                os.remove(self.path(name))
+
+    def register_warmer(self, warmer):
+        self.warmers.append(warmer)
+
+    def prewarm(self, presets=None):
+        """
+        Computes the results of the presets (all saved presets if None) in a background thread.
+            returns: the thread
+        """
+        if presets is None:
+            presets = [self.load(name) for name in self.names()]
+        thread = threading.Thread(target=self.warm, args=(presets,), name='preset-prewarm', daemon=True)
+        thread.start()
+        return thread
+
+    def prewarm_once(self):
+        """
+        Pre-warms the saved presets the first time it is called in this server process.
+        """
+        with self.lock:
+            if self.prewarmed:
+                return None
+            self.prewarmed = True
+        return self.prewarm()
+
+    def warm(self, presets):
+        # The warmers register themselves on import, the pages that import them are
+        # only imported when they are opened
+        for module_name in WARMER_MODULES:
+            importlib.import_module(module_name)
+        korpus_dict = corpus_manifest.refresh()
+        for filters in presets:
+            corpus_select = filters['corpus_select']
+            if corpus_select not in korpus_dict:
+                continue
+            try:
+                corpus = corpus_cache.get(corpus_select, korpus_dict[corpus_select])
+                filtered_df = filter_engine.apply(corpus, filter_spec(filters))
+                for warmer in self.warmers:
+                    warmer(corpus, filters, filtered_df)
+            except Exception as e:
+                print(f"Could not pre-warm the preset for {corpus_select}: {e}")
+
+
+# Process wide instance, shared by all sessions
+preset_library = PresetLibrary()
@@ -6,18 +6,11 @@ from millify import millify
 import pandas as pd
 import numpy as np
 
-import plotly.express as px
-import plotly.graph_objects as go
-
-
 import streamlit as st
 import io
-import ast
 import os
-import yt_dlp
 from pathlib import Path
 import re
-import imageio_ffmpeg as ffmpeg
 
 class SocialMedia():
 
@@ -29,56 +22,52 @@ class SocialMedia():
             yield word + " "
             time.sleep(0.02)
 
-    def display_reconstructed_page(self,corpus_select,row_video_id,dataframe):
+    def display_reconstructed_page(self,corpus_select,row_video_id,corpus):
         
         # Hide this until user clicks on the data
 
-        # dataframe['video_id'] = dataframe['video_id'].astype(str)
-        dataframe = dataframe[dataframe['video_id']==str(row_video_id)]
-        dataframe.reset_index(drop=True, inplace=True)
+        # Post metadata comes from the posts table, the comments from the comments table
+        post = corpus.post(row_video_id)
+        comments = corpus.comments_for(str(row_video_id)).reset_index(drop=True)
 
-        platform = str(dataframe.loc[0, 'platform'] )
-        title = str(dataframe['title'][0])
-        description = str(dataframe['video_description'][0])
-        video_id = str(dataframe['video_id'][0])
+        platform = str(post['platform'])
+        title = str(post['title'])
+        description = str(post['video_description'])
+        video_id = str(post['video_id'])
+        comments_count = len(comments)
 
         if platform.lower() == "youtube":
-            video_url = str(dataframe['original_url'][0])
-            # comments_count = int(dataframe['comments_count'][0])
-            comments_count = max(len(dataframe) - 1, 0)
+            video_url = str(post['original_url'])
         elif platform.lower() == "tiktok":
             # Manually construct the TikTok URL using the video_id
             video_url = f"https://www.tiktok.com/@username/video/{video_id}"
-            # comments_count = int(dataframe['comments_count'][0])
-            comments_count = max(len(dataframe) - 1, 0)
         elif platform.lower()=='instagram':
             video_url = f"https://instagram.com/p/{video_id}"
-            comments_count = max(len(dataframe) - 1, 0)
 
-        views_count = str(dataframe['views_count'][0])
-        likes_count = dataframe['like_count'][0]
+        views_count = str(post['views_count'])
+        likes_count = post['like_count']
         
         
-        subscribers_count = str(dataframe['subscribers_count'][0])
-        transcripts = dataframe['transcript_german'][0]
+        subscribers_count = str(post['subscribers_count'])
+        transcripts = post['transcript_german']
 
         # Date upload/extracted
-        date_uploaded = dataframe['upload_date'][0].date()
+        date_uploaded = post['upload_date'].date()
 
         if platform.lower() == 'tiktok':
-            date_extracted = dataframe['extracted_date'][0]
+            date_extracted = post['extracted_date']
         elif platform.lower() == 'youtube':
             if corpus_select == 'influencer_korpus':
-                date_extracted = dataframe['extracted_date'][0]
+                date_extracted = post['extracted_date']
             else:
                 try:
-                    timestamp = float(dataframe['extracted_date'][0])
+                    timestamp = float(post['extracted_date'])
                     dt_object = datetime.datetime.utcfromtimestamp(timestamp)
                     date_extracted = dt_object.strftime('%d.%m.%Y')
                 except Exception as e:
                     st.error (f"Error: {e}") 
         elif platform.lower() == 'instagram':
-            date_extracted = dataframe['extracted_date'][0].split(" ")[0]
+            date_extracted = post['extracted_date'].split(" ")[0]
         
         
         # st.markdown(
@@ -112,7 +101,7 @@ class SocialMedia():
                 
                 with st.container(height=600):
                     st.subheader("Most Positive/Negative Comment Based on SentiWS",divider='blue')
-                    self.most_sentiment_comments(dataframe,video_id)
+                    self.most_sentiment_comments(comments,video_id)
                 
                 
             with desc_col:
@@ -140,11 +129,11 @@ class SocialMedia():
                 col2.markdown(f"\n **Likes:** {millify(likes_count)}")
                 anonymous = col1.checkbox("Anonymous")
                 if platform =='TikTok':
-                    video_duration = col2.markdown(f"\n**Video Duration:** {dataframe['video_duration'][0]} sec")
+                    video_duration = col2.markdown(f"\n**Video Duration:** {post['video_duration']} sec")
                 elif platform =='YouTube':
-                    video_duration = col2.markdown(f"\n**Video Duration:** {dataframe['video_duration'][0]}")
+                    video_duration = col2.markdown(f"\n**Video Duration:** {post['video_duration']}")
                 elif platform == 'Instagram':
-                    video_duration = col2.markdown(f"\n**Video Duration:** {dataframe['video_duration'][0]} sec")
+                    video_duration = col2.markdown(f"\n**Video Duration:** {post['video_duration']} sec")
                 col2.write("   ")
 
                 # Analyze the post
@@ -168,7 +157,7 @@ class SocialMedia():
                 # Download the post metadata
                 with col2:
                     if st.download_button(label="Download Post Data",
-                                          data=self.save_post_data(df=dataframe,video_id=video_id),
+                                          data=self.save_post_data(df=corpus.rows([video_id]),video_id=video_id),
                                           file_name=f'{platform}_{video_id}_post.csv',
                                           mime='text/csv'
                                                    ):
@@ -193,12 +182,12 @@ class SocialMedia():
                             st.write("No Comments")
                         else:
                             if anonymous== True:
-                                anonymous_dict = self.create_anonymous_mapping(df=dataframe,
+                                anonymous_dict = self.create_anonymous_mapping(df=comments,
                                                                                video_id=video_id)
-                                self.display_comments(video_id,dataframe,anonymous_dict,platform)
+                                self.display_comments(video_id,comments,anonymous_dict,platform)
                             else:
                                 anonymous_dict = {}
-                                self.display_comments(video_id,dataframe,anonymous_dict,platform)
+                                self.display_comments(video_id,comments,anonymous_dict,platform)
                             # self.display_comments(video_id,comments_df)
                         # st.markdown('</div>', unsafe_allow_html=True)
                 
@@ -211,12 +200,12 @@ class SocialMedia():
                     #             }
                     #             </style>
                     #             """,
-                    #             unsafe_allow_html=True ast.literal_eval(sentiment_data)
+                    #             unsafe_allow_html=True
                     #         )
                     with st.container(height=700):
                         indent = '&ensp;&thinsp;&ensp;&thinsp;'
-                        st.markdown(f'{dataframe["transcript_source"][0]}')
-                        st.markdown(f'{":speech_balloon:"} :green-background[**German_Sentiment_Score:**] {ast.literal_eval(dataframe["german_sentiment_transcript"][0])[0][0]} {indent} {":speech_balloon:"} :green-background[**Sentiws_Sentiment_Score:**] {dataframe["sentiws_sentiment_transcript"][0]}')
+                        st.markdown(f'{post["transcript_source"]}')
+                        st.markdown(f'{":speech_balloon:"} :green-background[**German_Sentiment_Score:**] {post["german_sentiment_transcript_label"]} {indent} {":speech_balloon:"} :green-background[**Sentiws_Sentiment_Score:**] {post["sentiws_sentiment_transcript"]}')
                         # st.markdown('<div class="transcripts-container">', unsafe_allow_html=True)
                         if transcripts is 'No Transcript':
                             st.write_stream(self.stream_data(transcripts + "Need to Implement/Transcribe automatically"))
@@ -245,7 +234,7 @@ class SocialMedia():
             with col_1:
                 st.subheader("Unique Users in Comments",divider='blue')
                 with col_1.container(height=600):
-                    unique_users = self.count_comments_per_author(comments_df=dataframe,
+                    unique_users = self.count_comments_per_author(comments_df=comments,
                                                    video_id=video_id,
                                                    )
             with col_2:
@@ -260,6 +249,10 @@ class SocialMedia():
     
     
     def download_video(self, video_id, platform, save_path):
+        # Imported on first use, only needed for downloads
+        import yt_dlp
+        import imageio_ffmpeg as ffmpeg
+
         st.warning(f"Downloading the video from {platform}")
         
         if platform.lower() == 'youtube':
@@ -301,8 +294,8 @@ class SocialMedia():
             st.write("No comments available for this video.")
             return
         
-        if 'german_sentiment_comments' not in comments.columns or 'sentiws_sentiment_comments' not in comments.columns:
-            st.error("Required columns 'german_sentiment_comments' or 'sentiws_sentiment_comments' do not exist in the DataFrame.")
+        if 'german_sentiment_comments_label' not in comments.columns or 'sentiws_sentiment_comments' not in comments.columns:
+            st.error("Required columns 'german_sentiment_comments_label' or 'sentiws_sentiment_comments' do not exist in the DataFrame.")
             return
         
         try:
@@ -317,59 +310,36 @@ class SocialMedia():
             st.write("No valid sentiment scores available for this video.")
             return
         
-        positive_comments = []
-        negative_comments = []
-        neutral_comments = []
+        # Sentiment labels are parsed at ingest, see CorpusStore.parse_sentiment_column
+        positive_comments = comments[comments['german_sentiment_comments_label'] == 'positive']
+        negative_comments = comments[comments['german_sentiment_comments_label'] == 'negative']
 
-        for index, row in comments.iterrows():
-            
-            sentiment_data = ast.literal_eval(row['german_sentiment_comments'])
-            sentiment_label = sentiment_data[0][0]
-            sentiment_score = row['sentiws_sentiment_comments']
-
-            if sentiment_label == 'positive':
-                positive_comments.append((index, sentiment_score, row))
-            elif sentiment_label == 'negative':
-                negative_comments.append((index, sentiment_score, row))
-            elif sentiment_label == 'neutral':
-                neutral_comments.append((index, sentiment_score, row))
-
-        if positive_comments:
-            # Sort the positive comments based on sentiment_score
-            most_positive_comment = max(positive_comments, key=lambda x: x[1])[2]
+        if not positive_comments.empty:
+            # Most positive comment based on sentiment_score
+            most_positive_comment = positive_comments.loc[positive_comments['sentiment_score'].idxmax()]
             st.markdown(
                 f":green-background[**Most Positive Comment:**] {indent} :speech_balloon: "
-                f"**German Sentiment:** {ast.literal_eval(most_positive_comment['german_sentiment_comments'])[0][0]} {indent} "
+                f"**German Sentiment:** {most_positive_comment['german_sentiment_comments_label']} {indent} "
                 f"**Sentiws_Sentiment:** {most_positive_comment['sentiws_sentiment_comments']} \n\n{most_positive_comment['comment_text']}"
             )
         else:
             st.write("No positive comments available for sentiment analysis.")
 
-        if negative_comments:
-            # Sort the negative comments based on sentiment_score (lower score is more negative)
-            most_negative_comment = min(negative_comments, key=lambda x: x[1])[2]
+        if not negative_comments.empty:
+            # Most negative comment based on sentiment_score (lower score is more negative)
+            most_negative_comment = negative_comments.loc[negative_comments['sentiment_score'].idxmin()]
             st.markdown(
                 f":red-background[**Most Negative Comment:**] {indent} :speech_balloon: "
-                f"**German Sentiment:** {ast.literal_eval(most_negative_comment['german_sentiment_comments'])[0][0]} {indent} "
+                f"**German Sentiment:** {most_negative_comment['german_sentiment_comments_label']} {indent} "
                 f"**Sentiws_Sentiment:** {most_negative_comment['sentiws_sentiment_comments']} \n\n{most_negative_comment['comment_text']}"
             )
         else:
             st.write("No negative comments available for sentiment analysis.")
 
 
-
-        # Display results using Streamlit
-        # st.markdown(
-        #     f":green-background[**Most Positive Comment:**] {indent} :speech_balloon:  " 
-        #     f"**German Sentiment:** {ast.literal_eval(most_positive_comment['german_sentiment_comments'])[0][0]} {indent} {':speech_balloon:'} **Sentiws_Sentiment:** {most_positive_comment['sentiws_sentiment_comments']} \n\n{most_positive_comment['comment_text']}" 
-        # )
-        # st.markdown(
-        #     f":red-background[**Most Negative Comment:**] {indent} :speech_balloon: "
-        #     f"**German Sentiment:** {ast.literal_eval(most_negative_comment['german_sentiment_comments'])[0][0]} {indent} {':speech_balloon:'} **Sentiws_Sentiment:** {most_negative_comment['sentiws_sentiment_comments']} \n\n{most_negative_comment['comment_text']}"
-        # )
-
-
     def unique_users_comments_pie_chart(self,unique_users):
+        import plotly.graph_objects as go
+
         # st.markdown(
         #             """
         #             <style>
@@ -439,25 +409,13 @@ class SocialMedia():
         df.to_csv(output, index=False)
         return output.getvalue()
     
-    # def eval_safe(self,val):
-    #     try:
-    #         return eval(val)
-    #     except (SyntaxError, NameError):
-    #         return None
-        
-    def eval_safe(self,val):
-        try:
-            # Check if the value is a string
-            if isinstance(val, str):
-                return eval(val)
-            else:
-                # If not a string, return the value as is or handle accordingly
-                return val
-        except Exception as e:
-            # Handle evaluation errors gracefully
-            print(f"Error in eval_safe with value {val}: {e}")
-            return None 
-    
+    def sentiment_emoji(self,sentiment_label):
+        emojis = {'positive': ':smiley:',
+                  'negative': ':rage:',
+                  'neutral': ':neutral_face:'
+                  }
+        return emojis.get(sentiment_label, ':grey_question:')
+
     def create_anonymous_mapping(self,df,video_id):
         comments = df[df['video_id'] == video_id]
         unique_authors = comments['author_name'].unique()
@@ -465,11 +423,8 @@ class SocialMedia():
     
     def display_comments(self,video_id,df,anonymous_dict,platform):
         
-        if platform == "TikTok" or "Instagram":
-            column_name = 'replied_to_comment_id'
-            first_nan_index = df[df[column_name].isna()].index[0]
-            # Replace all NaNs with 'root', except for the first NaN
-            df.loc[df.index != first_nan_index, column_name] = df.loc[df.index != first_nan_index, column_name].fillna('root') 
+        # Comments without a parent comment are root comments
+        df = df.assign(replied_to_comment_id=df['replied_to_comment_id'].fillna('root'))
         
         comments = df[df['video_id'] == video_id]
         
@@ -496,18 +451,7 @@ class SocialMedia():
             author_name = comment['author_name']
             author_name = anonymous_dict[author_name]
 
-        sentiment_score = self.eval_safe(comment['german_sentiment_comments'])
-
-        
-        if pd.isna(sentiment_score) or type(sentiment_score)==float:
-            sentiment_score = 'neutral'
-            sentiment_text = ':grey_question:'
-        elif sentiment_score[0][0] == 'positive':
-            sentiment_text = ':smiley:'
-        elif sentiment_score[0][0] == 'negative':
-            sentiment_text = ':rage:'
-        elif sentiment_score[0][0] == 'neutral':
-            sentiment_text = ':neutral_face:'
+        sentiment_text = self.sentiment_emoji(comment['german_sentiment_comments_label'])
 
         st.markdown(f"""
         👤 **{author_name}** {indent}❤️ {int(comment['comment_likes'])} {indent} {':speech_balloon:'} **sentiment_german:** {sentiment_text} {indent} {':speech_balloon:'} **sentiment_sentiws:** {float(comment['sentiws_sentiment_comments'])}
@@ -521,17 +465,7 @@ class SocialMedia():
 
         for _, reply in replies.iterrows():
 
-            sentiment_score = self.eval_safe(reply['german_sentiment_comments'])
-           
-            if pd.isna(sentiment_score) or type(sentiment_score)==float:
-                sentiment_score = 'neutral'
-                sentiment_text = ':grey_question:'
-            if sentiment_score[0][0] == 'positive':
-                sentiment_text = ':smiley:'
-            elif sentiment_score[0][0] == 'negative':
-                sentiment_text = ':rage:'
-            elif sentiment_score[0][0] == 'neutral':
-                sentiment_text = ':neutral_face:'
+            sentiment_text = self.sentiment_emoji(reply['german_sentiment_comments_label'])
 
             # anonymize the comments
             if anonymous_dict == {}:
@@ -0,0 +1,132 @@
+# import modules
+import os
+import re
+from collections import Counter, defaultdict
+import numpy as np
+import scipy.sparse as sp
+
+# Texts of the word clouds: the transcript of each post, the text of each comment
+TERM_COLUMNS = {'posts': 'transcript_german', 'comments': 'comment_text'}
+STOPWORDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'word_cloud_stopwords.txt')
+# Words as WordCloud splits them
+TOKEN_PATTERN = re.compile(r"\w[\w']*")
+
+
+def read_stopwords(path=STOPWORDS_FILE):
+    """
+    The german stopwords of the word clouds and the english ones of WordCloud, lowercased.
+    """
+    # Imported here, wordcloud imports matplotlib
+    from wordcloud import STOPWORDS
+    with open(path, 'r', encoding='utf-8') as file:
+        german = [word.strip() for word in file if word.strip()]
+    return frozenset(word.lower() for word in german + list(STOPWORDS))
+
+
+def count_terms(text, stopwords):
+    """
+    Word counts of a text without numbers and stopwords, like WordCloud.process_text.
+    """
+    if not isinstance(text, str):
+        return {}
+    words = (word[:-2] if word.lower().endswith("'s") else word for word in TOKEN_PATTERN.findall(text))
+    return Counter(word for word in words if word and not word.isdigit() and word.lower() not in stopwords)
+
+
+def fuse_terms(term_counts):
+    """
+    Merges the case variants of a word (shown in their most frequent case) and
+    plurals ending in 's' into the singular, like wordcloud.tokenization.process_tokens.
+        term_counts: iterable of (term, count)
+        returns: {term: count}
+    """
+    cases = defaultdict(dict)
+    for term, count in term_counts:
+        cases[term.lower()][term] = count
+    for key in list(cases):
+        if key.endswith('s') and not key.endswith('ss') and key[:-1] in cases:
+            singular_cases = cases[key[:-1]]
+            for term, count in cases.pop(key).items():
+                singular_cases[term[:-1]] = singular_cases.get(term[:-1], 0) + count
+    return {max(case_counts.items(), key=lambda item: item[1])[0]: sum(case_counts.values())
+            for case_counts in cases.values()}
+
+
+class TermCounts():
+    """
+    Word counts of the post transcripts and the comment texts as sparse matrices
+    (one row per post / comment in the order of Corpus.posts / Corpus.comments,
+    one column per word of the shared vocabulary). Built at ingest, the word cloud
+    of a selection sums its rows instead of joining and splitting the texts.
+    """
+
+    def __init__(self, vocabulary, matrices) -> None:
+        self.vocabulary = vocabulary  # np.array of the words, column order
+        self.matrices = matrices      # table -> scipy.sparse.csr_matrix (rows x words), int32
+
+    @classmethod
+    def build(cls, posts, comments, stopwords=None):
+        stopwords = read_stopwords() if stopwords is None else stopwords
+        vocabulary = {}
+        rows = {}
+        for table, dataframe in (('posts', posts), ('comments', comments)):
+            column = TERM_COLUMNS[table]
+            texts = dataframe[column].astype(object).tolist() if column in dataframe.columns else [None] * len(dataframe)
+            indptr, indices, data = [0], [], []
+            for text in texts:
+                for term, count in count_terms(text, stopwords).items():
+                    indices.append(vocabulary.setdefault(term, len(vocabulary)))
+                    data.append(count)
+                indptr.append(len(indices))
+            rows[table] = (data, indices, indptr)
+        matrices = {table: sp.csr_matrix((np.array(data, dtype='int32'), np.array(indices, dtype='int32'), indptr),
+                                         shape=(len(indptr) - 1, len(vocabulary)))
+                    for table, (data, indices, indptr) in rows.items()}
+        return cls(np.array(list(vocabulary), dtype=object), matrices)
+
+    def merge(self, other):
+        """
+        The counts of an appended batch: its rows follow the rows of this one.
+        """
+        vocabulary = {term: position for position, term in enumerate(self.vocabulary)}
+        columns = np.array([vocabulary.setdefault(term, len(vocabulary)) for term in other.vocabulary], dtype='int32')
+        matrices = {}
+        for table, matrix in self.matrices.items():
+            appended = other.matrices[table]
+            appended = sp.csr_matrix((appended.data, columns[appended.indices], appended.indptr),
+                                     shape=(appended.shape[0], len(vocabulary)))
+            matrix = sp.csr_matrix((matrix.data, matrix.indices, matrix.indptr), shape=(matrix.shape[0], len(vocabulary)))
+            matrices[table] = sp.vstack([matrix, appended], format='csr', dtype='int32')
+        return TermCounts(np.array(list(vocabulary), dtype=object), matrices)
+
+    def frequencies(self, table, positions=None):
+        """
+        Word frequencies of the rows at the positions (all rows if None) for WordCloud.generate_from_frequencies.
+        """
+        matrix = self.matrices[table]
+        if positions is not None:
+            matrix = matrix[np.asarray(positions, dtype='int64')]
+        counts = np.asarray(matrix.sum(axis=0)).ravel()
+        terms = np.flatnonzero(counts)
+        return fuse_terms(zip(self.vocabulary[terms], counts[terms].tolist()))
+
+    def write(self, path):
+        arrays = {'vocabulary': self.vocabulary.astype(str)}
+        for table, matrix in self.matrices.items():
+            arrays.update({f'{table}_data': matrix.data, f'{table}_indices': matrix.indices,
+                           f'{table}_indptr': matrix.indptr, f'{table}_shape': np.array(matrix.shape)})
+        with open(path, 'wb') as file:
+            np.savez_compressed(file, **arrays)
+
+    @classmethod
+    def read(cls, path):
+        with np.load(path) as arrays:
+            vocabulary = arrays['vocabulary'].astype(object)
+            matrices = {table: sp.csr_matrix((arrays[f'{table}_data'], arrays[f'{table}_indices'], arrays[f'{table}_indptr']),
+                                             shape=tuple(arrays[f'{table}_shape']))
+                        for table in TERM_COLUMNS}
+        return cls(vocabulary, matrices)
+
+    def memory_usage(self):
+        return int(sum(matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes for matrix in self.matrices.values())
+                   + sum(len(term) for term in self.vocabulary))
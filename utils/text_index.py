@@ -0,0 +1,125 @@
+# import modules
+import re
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Post text columns searched by the keyword filter
+INDEX_COLUMNS = ['title', 'video_description', 'transcript_german']
+# Tokens are the lowercased runs of word characters (letters incl. umlauts and ß, digits, _),
+# the keyword matcher lowercases the texts the same way
+TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+class TextIndex():
+    """
+    Inverted index of the post texts: column -> token -> set of video_ids.
+    Built at ingest and stored next to the korpus tables (text_index.parquet).
+    """
+
+    def __init__(self, postings=None) -> None:
+        self.postings = postings if postings is not None else {column: {} for column in INDEX_COLUMNS}
+        self.vocabularies = {}  # column -> tokens, for substring lookups
+
+    @classmethod
+    def build(cls, posts):
+        """
+        Indexes the text columns of a posts frame (with video_id).
+        """
+        index = cls()
+        for column in INDEX_COLUMNS:
+            if column not in posts.columns:
+                continue
+            postings = index.postings[column]
+            for video_id, text in zip(posts['video_id'].astype(str), posts[column].astype(object)):
+                if not isinstance(text, str):
+                    continue
+                for token in set(tokenize(text)):
+                    postings.setdefault(token, set()).add(video_id)
+        return index
+
+    def merge(self, other):
+        """
+        Adds the postings of another index, e.g. of an appended batch.
+        """
+        for column, postings in other.postings.items():
+            merged = self.postings.setdefault(column, {})
+            for token, video_ids in postings.items():
+                merged.setdefault(token, set()).update(video_ids)
+        self.vocabularies = {}
+        return self
+
+    def vocabulary(self, column):
+        if column not in self.vocabularies:
+            self.vocabularies[column] = list(self.postings.get(column, {}))
+        return self.vocabularies[column]
+
+    def lookup(self, token, columns, whole_word=False):
+        """
+        video_ids of the posts with the token in one of the columns. Without whole_word
+        every indexed token containing it counts (e.g. rente -> betriebsrente).
+        """
+        video_ids = set()
+        for column in columns:
+            postings = self.postings.get(column, {})
+            if whole_word:
+                video_ids.update(postings.get(token, ()))
+            else:
+                for indexed_token in self.vocabulary(column):
+                    if token in indexed_token:
+                        video_ids.update(postings[indexed_token])
+        return video_ids
+
+    def search(self, keywords, columns, mode='any', whole_word=False):
+        """
+        Resolves keywords through the posting lists, intersection for mode 'all', union for 'any'.
+            returns: (video_ids, exact). exact is False when a keyword is not a single token
+                     (phrases, #tags), the video_ids are then candidates that need a text scan.
+                     video_ids is None if the index can not narrow the search down.
+        """
+        matches = []
+        exact = True
+        for keyword in keywords:
+            tokens = tokenize(keyword)
+            if not tokens:
+                # Nothing to look up (e.g. only punctuation)
+                return None, False
+            if len(tokens) > 1 or tokens[0] != keyword.strip().lower():
+                exact = False
+                # All tokens of the phrase appear in the post (in any of the columns). The first and
+                # last token may be the end and start of longer words, so they match as substrings
+                video_ids = None
+                for position, token in enumerate(tokens):
+                    inner = 0 < position < len(tokens) - 1
+                    token_ids = self.lookup(token, columns, whole_word=whole_word or inner)
+                    video_ids = token_ids if video_ids is None else video_ids & token_ids
+            else:
+                video_ids = self.lookup(tokens[0], columns, whole_word=whole_word)
+            matches.append(video_ids)
+
+        if mode == 'all':
+            return set.intersection(*matches), exact
+        return set.union(*matches), exact
+
+    def to_table(self):
+        rows = [(column, token, sorted(video_ids))
+                for column, postings in self.postings.items() for token, video_ids in postings.items()]
+        return pa.table({
+            'column': pa.array([row[0] for row in rows], pa.string()),
+            'token': pa.array([row[1] for row in rows], pa.string()),
+            'video_ids': pa.array([row[2] for row in rows], pa.list_(pa.string())),
+        })
+
+    def write(self, path):
+        pq.write_table(self.to_table(), path)
+
+    @classmethod
+    def read(cls, path):
+        table = pq.read_table(path).to_pydict()
+        index = cls()
+        for column, token, video_ids in zip(table['column'], table['token'], table['video_ids']):
+            index.postings.setdefault(column, {})[token] = set(video_ids)
+        return index
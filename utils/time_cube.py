@@ -0,0 +1,89 @@
+# import modules
+import threading
+from collections import OrderedDict
+import pandas as pd
+
+# Custom imports
+from utils import presets
+from utils.presets import preset_library
+
+CUBE_MEASURES = ['post_count', 'subscribers_count']
+
+
+class TimeCube():
+    """
+    Post counts and subscriber sums of a filter result per
+    (day, platform, hashtag/profile, channel, media_type). The charts over time
+    roll it up to days, months or years instead of grouping the posts again.
+    Posts without title or upload date are left out, like in the charts.
+    """
+
+    def __init__(self, cube, group_column) -> None:
+        self.cube = cube
+        self.group_column = group_column
+
+    @classmethod
+    def build(cls, posts, group_column):
+        posts = posts[posts['title'].notna() & posts['upload_date'].notna()]
+        dimensions = list(dict.fromkeys(['platform', group_column, 'channel_name', 'media_type']))
+        keys = pd.DataFrame({'day': posts['upload_date'].dt.normalize()})
+        for column in dimensions:
+            # Object keys, missing values stay in the cube as their own group
+            keys[column] = posts[column].astype(object) if column in posts.columns else None
+        keys['subscribers_count'] = posts['subscribers_count']
+        grouped = keys.groupby(['day'] + dimensions, dropna=False, sort=True)
+        cube = grouped['subscribers_count'].sum().reset_index()
+        cube.insert(len(cube.columns) - 1, 'post_count', grouped.size().to_numpy())
+        return cls(cube, group_column)
+
+    def rollup(self, date_filter, column, platform=None):
+        """
+        Sums of the measures by (period, column), the periods as strings like in the charts.
+            date_filter: pandas period frequency (D, M or Y)
+            platform: only the cells of this platform if given
+        """
+        cube = self.cube if platform is None else self.cube[self.cube['platform'] == platform]
+        rolled = cube.groupby([cube['day'].dt.to_period(date_filter), column])[CUBE_MEASURES].sum().reset_index()
+        rolled = rolled.rename(columns={'day': 'upload_date'})
+        rolled['upload_date'] = rolled['upload_date'].astype(str)
+        return rolled
+
+
+class TimeCubeCache():
+    """
+    Time cubes of filter results keyed by the FilterSpec hash, shared by all sessions.
+    """
+
+    def __init__(self, max_entries=32) -> None:
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # (corpus name, korpus mtime, spec key) -> TimeCube
+        self.lock = threading.Lock()
+
+    def get(self, corpus, spec, filtered_df):
+        """
+        The cube of filtered_df, the result of filter_engine.apply(corpus, spec).
+        """
+        key = (corpus.name, corpus.store.mtime(corpus.csv_path), spec.key())
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+        cube = TimeCube.build(filtered_df, spec.group_column)
+        with self.lock:
+            self.entries[key] = cube
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return cube
+
+    def warm(self, corpus, filters, filtered_df):
+        # Warmer of the saved presets (PresetLibrary.register_warmer)
+        self.get(corpus, presets.filter_spec(filters), filtered_df)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+# Process wide instance, shared by all sessions
+time_cube_cache = TimeCubeCache()
+preset_library.register_warmer(time_cube_cache.warm)
@@ -0,0 +1,82 @@
+# import modules
+import io
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Settings of the word clouds on the Plots page. The layout is random, a fixed
+# random_state draws the same cloud for the same words
+WORD_CLOUD_SETTINGS = {
+    'width': 450,
+    'height': 250,
+    'scale': 2,
+    'background_color': 'white',
+    'random_state': 1,
+}
+
+
+def render_word_cloud(frequencies, settings=WORD_CLOUD_SETTINGS):
+    """
+    Draws a word cloud of the word frequencies straight to PNG bytes, without pyplot.
+    """
+    # Imported on first use, wordcloud is slow to import
+    from wordcloud import WordCloud
+
+    wordcloud = WordCloud(**settings).generate_from_frequencies(frequencies)
+    buffer = io.BytesIO()
+    wordcloud.to_image().save(buffer, format='png')
+    return buffer.getvalue()
+
+
+class WordCloudImageCache():
+    """
+    PNG images of word clouds keyed by the hash of the filter state, the table
+    (transcripts or comments) and the settings, shared by all sessions. A hit needs
+    neither the word frequencies nor a hash over them. Several clouds are drawn in
+    parallel threads.
+    """
+
+    def __init__(self, max_entries=64, max_workers=2) -> None:
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # hash -> png bytes, None for clouds without words
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='word-cloud')
+
+    @staticmethod
+    def key(filter_key, table, settings):
+        canonical = json.dumps([filter_key, table, settings], sort_keys=True, default=str)
+        return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+    def get(self, filter_key, table, frequencies, settings=WORD_CLOUD_SETTINGS):
+        """
+        The PNG bytes of the word cloud, None if there are no words.
+            filter_key: filter state of the words, see FigureCache.filter_key
+            frequencies: returns the word frequencies, only called if the image is not cached
+        """
+        key = self.key(filter_key, table, settings)
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+        words = frequencies()
+        image = render_word_cloud(words, settings) if words else None
+        with self.lock:
+            self.entries[key] = image
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return image
+
+    def get_many(self, filter_key, tables, settings=WORD_CLOUD_SETTINGS):
+        """
+        The images of several word clouds, the missing ones are drawn concurrently.
+            tables: [(table, frequencies), ...] as in get
+        """
+        futures = [self.executor.submit(self.get, filter_key, table, frequencies, settings)
+                   for table, frequencies in tables]
+        return [future.result() for future in futures]
+
+
+# Process wide instance, shared by all sessions
+word_cloud_images = WordCloudImageCache()